@@ -0,0 +1,232 @@
+import argparse
+import io
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import chess
+import chess.pgn
+import torch
+
+from main import ChessAI, INFTY, is_mate_score
+from bitboard import Position
+from data_processor import open_pgn
+
+TAG_LINE = re.compile(rb'^\[[A-Za-z0-9_]+\s+"')
+MAX_EVAL_CP = 10_000
+
+_worker_ai = None
+_worker_depth = 0
+_worker_move_time = 1.0
+
+
+def iter_raw_games(stream, offset=0):
+    """
+    Splits a binary PGN stream into raw game texts without parsing them.
+    Yields (game_text, end_offset) where end_offset is the byte offset at
+    which the next game starts, so it can be used to resume reading.
+    """
+    lines = []
+    in_movetext = False
+    for line in iter(stream.readline, b''):
+        if TAG_LINE.match(line) and in_movetext:
+            yield b''.join(lines).decode('utf-8', errors='replace'), offset
+            lines = []
+            in_movetext = False
+        elif line.strip() and not TAG_LINE.match(line):
+            in_movetext = True
+        lines.append(line)
+        offset += len(line)
+    if in_movetext:
+        yield b''.join(lines).decode('utf-8', errors='replace'), offset
+
+
+def _init_worker(model_path, depth, move_time):
+    global _worker_ai, _worker_depth, _worker_move_time
+    torch.set_num_threads(1)
+    _worker_ai = ChessAI(book_path=None, model_path=model_path)
+    _worker_depth = depth
+    _worker_move_time = move_time
+
+
+def white_cp(board: chess.Board, score: int) -> int:
+    """Converts a side-to-move score to White's point of view, clamping mate scores."""
+    score = score if board.turn == chess.WHITE else -score
+    if is_mate_score(score):
+        return MAX_EVAL_CP if score > 0 else -MAX_EVAL_CP
+    return max(-MAX_EVAL_CP, min(MAX_EVAL_CP, score))
+
+
+def evaluate_positions(boards):
+    """
+    Scores every board with the worker's ChessAI, White's point of view.
+    Checkmated positions get None.
+    """
+    ai = _worker_ai
+    if _worker_depth <= 0:
+        scores = ai.evaluate_batch(boards)
+    else:
+        ai.tt.clear()
+        ai.hard_time_limit = _worker_move_time
+        scores = [ai.negamax(Position.from_board(b), _worker_depth, -INFTY, INFTY, 0, time.time()) for b in boards]
+    return [None if b.is_checkmate() else white_cp(b, s) for b, s in zip(boards, scores)]
+
+
+def annotate_game(game_text, output_format):
+    """
+    Evaluates every mainline position of one game.
+    Returns (positions_evaluated, output_text).
+    """
+    game = chess.pgn.read_game(io.StringIO(game_text))
+    if game is None:
+        return 0, ''
+
+    # node.board() replays the game from the root each time, so walk one board instead
+    nodes = []
+    boards = []
+    board = game.board()
+    for node in game.mainline():
+        board.push(node.move)
+        nodes.append(node)
+        boards.append(board.copy(stack=False))
+    evals = evaluate_positions(boards) if boards else []
+
+    if output_format == 'jsonl':
+        moves = []
+        for ply, (node, cp) in enumerate(zip(nodes, evals), start=1):
+            moves.append({
+                "ply": ply,
+                "uci": node.move.uci(),
+                "san": node.san(),
+                "eval": cp,
+            })
+        record = {"headers": dict(game.headers), "moves": moves}
+        return len(boards), json.dumps(record) + '\n'
+
+    for node, cp in zip(nodes, evals):
+        if cp is None:
+            continue
+        tag = f"[%eval {cp / 100:.2f}]"
+        node.comment = f"{tag} {node.comment}".strip() if node.comment else tag
+    exporter = chess.pgn.StringExporter(headers=True, variations=True, comments=True)
+    return len(boards), game.accept(exporter) + '\n\n'
+
+
+def load_checkpoint(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def annotate(input_path, output_path, output_format='pgn', workers=None, depth=0, move_time=1.0,
+             model_path="chess_net.pth", resume=False, checkpoint_every=100, report_every=100,
+             max_games=None):
+    """
+    Streams games from input_path through a process pool and writes annotated
+    games to output_path in input order. Only a bounded window of games is in
+    flight at any time, so memory use does not grow with the archive size.
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = output_path + '.ckpt'
+    state = {"games": 0, "positions": 0, "offset": 0, "output_bytes": 0}
+
+    if resume:
+        saved = load_checkpoint(checkpoint_path)
+        if saved:
+            state = saved
+            print(f"Resuming after {state['games']} games (input offset {state['offset']})")
+    if resume and os.path.exists(output_path):
+        out = open(output_path, 'r+b')
+        out.truncate(state["output_bytes"])
+        out.seek(state["output_bytes"])
+    else:
+        out = open(output_path, 'wb')
+
+    stream = open_pgn(input_path, offset=state["offset"], binary=True)
+    raw_games = iter_raw_games(stream, offset=state["offset"])
+
+    start = time.time()
+    games_this_run = 0
+    positions_this_run = 0
+    window = deque()
+
+    def finish_oldest():
+        nonlocal games_this_run, positions_this_run
+        future, end_offset = window.popleft()
+        positions, text = future.result()
+        data = text.encode('utf-8')
+        out.write(data)
+        state["games"] += 1
+        state["positions"] += positions
+        state["offset"] = end_offset
+        state["output_bytes"] += len(data)
+        games_this_run += 1
+        positions_this_run += positions
+
+        if state["games"] % checkpoint_every == 0:
+            out.flush()
+            save_checkpoint(checkpoint_path, state)
+        if games_this_run % report_every == 0:
+            elapsed = time.time() - start
+            print(f"{state['games']} games, {state['positions']} positions "
+                  f"({games_this_run / elapsed:.1f} games/s, {positions_this_run / elapsed:.0f} positions/s)")
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(model_path, depth, move_time)) as pool:
+            for game_text, end_offset in raw_games:
+                if max_games is not None and state["games"] + len(window) >= max_games:
+                    break
+                window.append((pool.submit(annotate_game, game_text, output_format), end_offset))
+                if len(window) >= workers * 4:
+                    finish_oldest()
+            while window:
+                finish_oldest()
+    finally:
+        out.flush()
+        save_checkpoint(checkpoint_path, state)
+        out.close()
+        stream.close()
+
+    elapsed = time.time() - start
+    print(f"Annotated {games_this_run} games ({positions_this_run} positions) in {elapsed:.1f}s: "
+          f"{games_this_run / max(elapsed, 1e-9):.1f} games/s")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate a PGN archive with engine evaluations.")
+    parser.add_argument("input", help="input .pgn or .pgn.zst file")
+    parser.add_argument("output", help="output file (annotated PGN or JSONL)")
+    parser.add_argument("--format", choices=["pgn", "jsonl"], default="pgn")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--depth", type=int, default=0,
+                        help="search depth per position; 0 uses the static network evaluation")
+    parser.add_argument("--move-time", type=float, default=1.0, help="time limit per position when --depth > 0")
+    parser.add_argument("--model", default="chess_net.pth")
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint next to the output")
+    parser.add_argument("--checkpoint-every", type=int, default=100)
+    parser.add_argument("--report-every", type=int, default=100)
+    parser.add_argument("--max-games", type=int, default=None)
+    args = parser.parse_args()
+
+    annotate(args.input, args.output, output_format=args.format, workers=args.workers, depth=args.depth,
+             move_time=args.move_time, model_path=args.model, resume=args.resume,
+             checkpoint_every=args.checkpoint_every, report_every=args.report_every,
+             max_games=args.max_games)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import time
+
+import chess
+import torch
+
+from main import ChessAI, SearchParams
+from model import DEFAULT_VARIANT
+
+BENCH_FENS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 0 8",
+    "2r3k1/pp3ppp/4p3/3pP3/3P4/P4N2/1P3PPP/2R3K1 w - - 0 24",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1",
+]
+
+
+def run_bench(ai: ChessAI, depth: int, fens=BENCH_FENS, verbose: bool = False):
+    """
+    Searches every bench position to a fixed depth from an empty TT and
+    returns (total_nodes, total_seconds).
+    """
+    total_nodes = 0
+    total_time = 0.0
+    for fen in fens:
+        ai.tt.clear()
+        ai.killer_moves.clear()
+        ai.history_heuristic.clear()
+        board = chess.Board(fen)
+        start = time.time()
+        move = ai.search(board, max_depth=depth, move_time=float("inf")).move
+        elapsed = time.time() - start
+        total_nodes += ai.nodes
+        total_time += elapsed
+        if verbose:
+            print(f"  {fen:<70} {move.uci():<6} {ai.nodes:>9} nodes {elapsed:7.2f}s")
+    return total_nodes, total_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixed-depth search bench.")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--model", default="chess_net.pth")
+    parser.add_argument("--variant", default=DEFAULT_VARIANT, help="model architecture the weights belong to")
+    parser.add_argument("--params", default="", help="search parameter overrides for the candidate, e.g. lmr=0")
+    parser.add_argument("--baseline", default="disabled",
+                        help="overrides for the baseline ('disabled' turns all pruning off, 'none' skips it)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    torch.set_num_threads(1)
+    ai = ChessAI(book_path=None, model_path=args.model, model_variant=args.variant)
+
+    configs = [("candidate", SearchParams.from_string(args.params))]
+    if args.baseline == "disabled":
+        configs.insert(0, ("baseline", SearchParams.disabled()))
+    elif args.baseline != "none":
+        configs.insert(0, ("baseline", SearchParams.from_string(args.baseline)))
+
+    results = {}
+    for name, params in configs:
+        ai.set_search_params(params)
+        print(f"{name}: depth {args.depth}")
+        nodes, seconds = run_bench(ai, args.depth, verbose=args.verbose)
+        results[name] = (nodes, seconds)
+        print(f"{name}: {nodes} nodes in {seconds:.2f}s ({nodes / max(seconds, 1e-9):.0f} nps)")
+
+    if "baseline" in results:
+        base_nodes, base_time = results["baseline"]
+        nodes, seconds = results["candidate"]
+        print(f"Node reduction: {1 - nodes / base_nodes:.1%}, time-to-depth: {seconds / base_time:.2f}x baseline")
+
+
+if __name__ == "__main__":
+    main()
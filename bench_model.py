@@ -0,0 +1,97 @@
+import argparse
+import statistics
+import time
+
+import torch
+import torch.nn as nn
+
+from model import MODEL_VARIANTS, build_model, parameter_count
+
+BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+def weight_bytes(model: nn.Module) -> int:
+    return sum(t.numel() * t.element_size() for t in list(model.parameters()) + list(model.buffers()))
+
+
+def activation_bytes(model: nn.Module) -> int:
+    """Bytes of intermediate outputs for one position, summed over all submodules."""
+    total = 0
+
+    def hook(module, inputs, output):
+        nonlocal total
+        total += output.numel() * output.element_size()
+
+    handles = [m.register_forward_hook(hook) for m in model.modules() if m is not model]
+    with torch.no_grad():
+        model(torch.zeros(1, 12, 8, 8))
+    for handle in handles:
+        handle.remove()
+    return total
+
+
+def time_forward(model: nn.Module, batch_size: int, min_time: float, warmup: int = 5) -> float:
+    """Median seconds per forward pass of a random batch, repeated for at least min_time."""
+    x = (torch.rand(batch_size, 12, 8, 8) < 0.05).float()
+    samples = []
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(x)
+        start = time.perf_counter()
+        while time.perf_counter() - start < min_time or len(samples) < 5:
+            t = time.perf_counter()
+            model(x)
+            samples.append(time.perf_counter() - t)
+    return statistics.median(samples)
+
+
+def validation_loss(model: nn.Module, positions) -> float:
+    tensors = torch.stack([tensor for tensor, _ in positions])
+    labels = torch.tensor([label for _, label in positions], dtype=torch.float32).unsqueeze(1)
+    with torch.no_grad():
+        return nn.functional.mse_loss(model(tensors), labels).item()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU latency, size and (optionally) loss of the evaluation network variants.")
+    parser.add_argument("--variants", default=",".join(MODEL_VARIANTS), help="comma-separated variant names")
+    parser.add_argument("--batch-sizes", default=",".join(map(str, BATCH_SIZES)))
+    parser.add_argument("--threads", type=int, default=1, help="torch threads (the search evaluates on one)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to time each batch size")
+    parser.add_argument("--weights", default="", help="trained weights per variant, e.g. chessnet=chess_net.pth,narrow=narrow.pth")
+    parser.add_argument("--database", default=None, help="PGN database for validation loss of variants with weights")
+    parser.add_argument("--positions", type=int, default=20000)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    weights = dict(part.split("=", 1) for part in args.weights.split(",") if part)
+
+    positions = None
+    if args.database and weights:
+        from data_processor import parse_database
+        positions = []
+        for item in parse_database(args.database):
+            positions.append(item)
+            if len(positions) >= args.positions:
+                break
+
+    for name in variants:
+        model = build_model(name)
+        if name in weights:
+            model.load_state_dict(torch.load(weights[name], map_location="cpu"))
+        model.eval()
+
+        print(f"{name}: {parameter_count(model):,} parameters, weights {weight_bytes(model) / 2**20:.2f} MiB, "
+              f"activations {activation_bytes(model) / 1024:.1f} KiB/position")
+        if positions and name in weights:
+            print(f"  validation MSE on {len(positions)} positions: {validation_loss(model, positions):.5f}")
+        for batch_size in batch_sizes:
+            seconds = time_forward(model, batch_size, args.min_time)
+            print(f"  batch {batch_size:>4}: {seconds * 1000:8.3f} ms/batch, {seconds / batch_size * 1e6:8.1f} us/position, "
+                  f"{batch_size / seconds:>9.0f} positions/s")
+
+
+if __name__ == "__main__":
+    main()
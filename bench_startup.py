@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+IMPORT_SNIPPET = """
+import sys, time
+start = time.perf_counter()
+import server
+elapsed = time.perf_counter() - start
+print(elapsed, 'torch' in sys.modules)
+"""
+
+
+def measure_import(runs: int) -> tuple[float, bool]:
+    """Best-of-N wall time of `import server` in a fresh interpreter."""
+    best = float("inf")
+    torch_loaded = False
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+        elapsed, loaded = out.stdout.split()[-2:]
+        best = min(best, float(elapsed))
+        torch_loaded = loaded == "True"
+    return best, torch_loaded
+
+
+def timed_request(url: str, payload: dict | None = None) -> tuple[float, int]:
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return time.perf_counter() - start, status
+
+
+def wait_for(url: str, timeout: float, expect: int = 200) -> float | None:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            _, status = timed_request(url)
+            if status == expect:
+                return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.02)
+    return None
+
+
+def measure_server(port: int, warmup: bool, timeout: float):
+    """Starts uvicorn and times first health, rules, readiness and AI responses."""
+    env = dict(os.environ, CHESS_WARMUP="1" if warmup else "0")
+    base = f"http://127.0.0.1:{port}"
+    fen = urllib.parse.quote(START_FEN)
+    launched = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+                            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        up = wait_for(f"{base}/api/health", timeout)
+        if up is None:
+            print("Server did not come up")
+            return
+        print(f"  first /api/health after launch: {time.perf_counter() - launched:.3f}s")
+        rules, _ = timed_request(f"{base}/api/legal-moves?fen={fen}")
+        print(f"  first /api/legal-moves:         {rules * 1000:.1f}ms")
+        if warmup:
+            if wait_for(f"{base}/api/ready", timeout) is None:
+                print(f"  /api/ready: not ready after {timeout:.0f}s")
+                return
+            print(f"  /api/ready after launch:        {time.perf_counter() - launched:.3f}s")
+        evaluation, _ = timed_request(f"{base}/api/evaluate?fen={fen}")
+        print(f"  first /api/evaluate:            {evaluation * 1000:.1f}ms")
+        evaluation, _ = timed_request(f"{base}/api/evaluate?fen={fen}")
+        print(f"  second /api/evaluate:           {evaluation * 1000:.1f}ms")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure server import time and first-request latency.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    elapsed, torch_loaded = measure_import(args.runs)
+    print(f"import server: {elapsed * 1000:.1f}ms (torch imported: {torch_loaded})")
+    print("Server with background warm-up:")
+    measure_server(args.port, True, args.timeout)
+    print("Server without warm-up (engine loaded by the first AI request):")
+    measure_server(args.port, False, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
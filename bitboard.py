@@ -0,0 +1,575 @@
+"""
+Compact search-only position built on int bitboards.
+
+chess.Board keeps a full move stack and generic validation around every
+push/pop, which dominates search profiles. Position keeps only what the
+search needs: twelve piece bitboards, a mailbox for piece lookups, and a
+small undo stack so make/unmake never copies the board. Moves are plain
+ints (from | to << 6 | promotion << 12 | flags); the low 15 bits use the
+same encoding as the persistent cache. The hash is the polyglot Zobrist
+key, identical to chess.polyglot.zobrist_hash for the same position.
+"""
+import chess
+import chess.polyglot
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+EMPTY = -1
+
+FULL = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_3 = RANK_1 << 16
+RANK_6 = RANK_1 << 40
+RANK_8 = RANK_1 << 56
+LIGHT_SQUARES = 0x55AA55AA55AA55AA
+
+MOVE_MASK = 0x7FFF
+EP_FLAG = 1 << 15
+CASTLE_FLAG = 1 << 16
+DOUBLE_FLAG = 1 << 17
+
+CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ = 1, 2, 4, 8
+
+def _step_attacks(steps):
+    table = []
+    for sq in range(64):
+        rank, file = divmod(sq, 8)
+        bb = 0
+        for dr, df in steps:
+            r, f = rank + dr, file + df
+            if 0 <= r < 8 and 0 <= f < 8:
+                bb |= 1 << (r * 8 + f)
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _step_attacks([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+KING_ATTACKS = _step_attacks([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)])
+PAWN_ATTACKS = [_step_attacks([(1, -1), (1, 1)]), _step_attacks([(-1, -1), (-1, 1)])]
+
+# Rays from each square in each direction, excluding the square itself.
+# Directions 0-3 increase the square index (nearest blocker is the lowest
+# set bit), 4-7 decrease it (nearest blocker is the highest set bit).
+DIRECTIONS = [(1, 0), (0, 1), (1, 1), (1, -1), (-1, 0), (0, -1), (-1, -1), (-1, 1)]
+RAYS = [[0] * 64 for _ in DIRECTIONS]
+BETWEEN = [[0] * 64 for _ in range(64)]
+for _d, (_dr, _df) in enumerate(DIRECTIONS):
+    for _sq in range(64):
+        _r, _f = divmod(_sq, 8)
+        _between = 0
+        _r, _f = _r + _dr, _f + _df
+        while 0 <= _r < 8 and 0 <= _f < 8:
+            _target = _r * 8 + _f
+            RAYS[_d][_sq] |= 1 << _target
+            BETWEEN[_sq][_target] = _between
+            _between |= 1 << _target
+            _r, _f = _r + _dr, _f + _df
+
+N_RAY, E_RAY, NE_RAY, NW_RAY, S_RAY, W_RAY, SW_RAY, SE_RAY = RAYS
+ROOK_RAYS = [N_RAY[sq] | E_RAY[sq] | S_RAY[sq] | W_RAY[sq] for sq in range(64)]
+BISHOP_RAYS = [NE_RAY[sq] | NW_RAY[sq] | SW_RAY[sq] | SE_RAY[sq] for sq in range(64)]
+
+
+def rook_attacks(sq: int, occ: int) -> int:
+    attacks = 0
+    for rays in (N_RAY, E_RAY):
+        ray = rays[sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in (S_RAY, W_RAY):
+        ray = rays[sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def bishop_attacks(sq: int, occ: int) -> int:
+    attacks = 0
+    for rays in (NE_RAY, NW_RAY):
+        ray = rays[sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in (SW_RAY, SE_RAY):
+        ray = rays[sq]
+        blockers = ray & occ
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def squares(bb: int):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+# Polyglot Zobrist keys: piece index is kind * 2 + (1 for white, 0 for black)
+_RANDOM = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+Z_PIECE = [[[_RANDOM[64 * (kind * 2 + (1 if color == WHITE else 0)) + sq] for sq in range(64)]
+            for kind in range(6)] for color in range(2)]
+Z_CASTLE = [0] * 16
+for _rights in range(16):
+    for _bit in range(4):
+        if _rights & (1 << _bit):
+            Z_CASTLE[_rights] ^= _RANDOM[768 + _bit]
+Z_EP = [_RANDOM[772 + file] for file in range(8)]
+Z_WHITE_TURN = _RANDOM[780]
+
+# Castling rights that survive a move touching each square
+CASTLE_KEEP = [0xF] * 64
+CASTLE_KEEP[chess.E1] = 0xF & ~(CASTLE_WK | CASTLE_WQ)
+CASTLE_KEEP[chess.H1] = 0xF & ~CASTLE_WK
+CASTLE_KEEP[chess.A1] = 0xF & ~CASTLE_WQ
+CASTLE_KEEP[chess.E8] = 0xF & ~(CASTLE_BK | CASTLE_BQ)
+CASTLE_KEEP[chess.H8] = 0xF & ~CASTLE_BK
+CASTLE_KEEP[chess.A8] = 0xF & ~CASTLE_BQ
+
+CASTLE_ROOK_MOVES = {
+    chess.G1: (chess.H1, chess.F1), chess.C1: (chess.A1, chess.D1),
+    chess.G8: (chess.H8, chess.F8), chess.C8: (chess.A8, chess.D8),
+}
+
+
+def move_to_chess(move: int) -> chess.Move:
+    promotion = (move >> 12) & 0x7
+    return chess.Move(move & 0x3F, (move >> 6) & 0x3F, promotion or None)
+
+
+class Position:
+    """Mutable position for search; see the module docstring."""
+
+    __slots__ = ("bb", "occ", "mailbox", "turn", "castling", "ep", "ep_hashed",
+                 "halfmove", "hash", "undo", "history")
+
+    def __init__(self):
+        self.bb = [[0] * 6, [0] * 6]
+        self.occ = [0, 0]
+        self.mailbox = [EMPTY] * 64
+        self.turn = WHITE
+        self.castling = 0
+        self.ep = -1
+        self.ep_hashed = False
+        self.halfmove = 0
+        self.hash = 0
+        self.undo = []
+        self.history = []
+
+    @classmethod
+    def from_board(cls, board: chess.Board) -> "Position":
+        """
+        Converts a python-chess board. Raises ValueError for positions
+        python-chess accepts but the search can't handle (a missing king,
+        the side not to move in check, ...), see chess.Board.status().
+        """
+        if not board.is_valid():
+            raise ValueError(f"Illegal position ({board.status()!r}): {board.fen()}")
+        pos = cls()
+        for sq, piece in board.piece_map().items():
+            color = WHITE if piece.color == chess.WHITE else BLACK
+            kind = piece.piece_type - 1
+            pos.bb[color][kind] |= 1 << sq
+            pos.occ[color] |= 1 << sq
+            pos.mailbox[sq] = color * 6 + kind
+        pos.turn = WHITE if board.turn == chess.WHITE else BLACK
+        pos.castling = ((CASTLE_WK if board.has_kingside_castling_rights(chess.WHITE) else 0)
+                        | (CASTLE_WQ if board.has_queenside_castling_rights(chess.WHITE) else 0)
+                        | (CASTLE_BK if board.has_kingside_castling_rights(chess.BLACK) else 0)
+                        | (CASTLE_BQ if board.has_queenside_castling_rights(chess.BLACK) else 0))
+        pos.ep = board.ep_square if board.ep_square is not None else -1
+        pos.halfmove = board.halfmove_clock
+        pos.hash = chess.polyglot.zobrist_hash(board)
+        pos.ep_hashed = pos.ep >= 0 and bool(PAWN_ATTACKS[pos.turn ^ 1][pos.ep] & pos.bb[pos.turn][PAWN])
+
+        # Earlier positions since the last irreversible move, for repetition detection
+        previous = board.copy()
+        for _ in range(min(board.halfmove_clock, len(board.move_stack))):
+            previous.pop()
+            pos.history.append(chess.polyglot.zobrist_hash(previous))
+        pos.history.reverse()
+        return pos
+
+    # --- queries ---
+
+    def piece_kind_at(self, sq: int) -> int:
+        piece = self.mailbox[sq]
+        return EMPTY if piece == EMPTY else piece % 6
+
+    def king_square(self, color: int) -> int:
+        return self.bb[color][KING].bit_length() - 1
+
+    def attackers_exist(self, sq: int, by: int, occ: int) -> bool:
+        pieces = self.bb[by]
+        if PAWN_ATTACKS[by ^ 1][sq] & pieces[PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & pieces[KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & pieces[KING]:
+            return True
+        diagonal = pieces[BISHOP] | pieces[QUEEN]
+        if diagonal and bishop_attacks(sq, occ) & diagonal:
+            return True
+        straight = pieces[ROOK] | pieces[QUEEN]
+        if straight and rook_attacks(sq, occ) & straight:
+            return True
+        return False
+
+    def is_attacked(self, sq: int, by: int) -> bool:
+        return self.attackers_exist(sq, by, self.occ[0] | self.occ[1])
+
+    def is_check(self) -> bool:
+        return self.is_attacked(self.king_square(self.turn), self.turn ^ 1)
+
+    def is_capture(self, move: int) -> bool:
+        return self.mailbox[(move >> 6) & 0x3F] != EMPTY or bool(move & EP_FLAG)
+
+    def captured_kind(self, move: int) -> int:
+        if move & EP_FLAG:
+            return PAWN
+        return self.piece_kind_at((move >> 6) & 0x3F)
+
+    def gives_check(self, move: int) -> bool:
+        if move & (EP_FLAG | CASTLE_FLAG):
+            self.make(move)
+            check = self.is_check()
+            self.unmake()
+            return check
+        us = self.turn
+        king = self.king_square(us ^ 1)
+        frm = move & 0x3F
+        to = (move >> 6) & 0x3F
+        promotion = (move >> 12) & 0x7
+        kind = promotion - 1 if promotion else self.mailbox[frm] % 6
+        occ = ((self.occ[0] | self.occ[1]) & ~(1 << frm)) | (1 << to)
+        king_bit = 1 << king
+
+        # Direct check from the moved piece
+        if kind == PAWN:
+            if PAWN_ATTACKS[us][to] & king_bit:
+                return True
+        elif kind == KNIGHT:
+            if KNIGHT_ATTACKS[to] & king_bit:
+                return True
+        elif kind != KING:
+            if kind != ROOK and bishop_attacks(to, occ) & king_bit:
+                return True
+            if kind != BISHOP and rook_attacks(to, occ) & king_bit:
+                return True
+
+        # Discovered check: only possible if the piece left a line to the king
+        if not ((BISHOP_RAYS[king] | ROOK_RAYS[king]) >> frm) & 1:
+            return False
+        mine = self.bb[us]
+        others = ~(1 << frm)
+        if bishop_attacks(king, occ) & (mine[BISHOP] | mine[QUEEN]) & others:
+            return True
+        return bool(rook_attacks(king, occ) & (mine[ROOK] | mine[QUEEN]) & others)
+
+    def has_non_pawn_material(self, color: int) -> bool:
+        pieces = self.bb[color]
+        return bool(pieces[KNIGHT] | pieces[BISHOP] | pieces[ROOK] | pieces[QUEEN])
+
+    def is_insufficient_material(self) -> bool:
+        white, black = self.bb
+        if white[PAWN] | black[PAWN] | white[ROOK] | black[ROOK] | white[QUEEN] | black[QUEEN]:
+            return False
+        knights = white[KNIGHT] | black[KNIGHT]
+        bishops = white[BISHOP] | black[BISHOP]
+        if not knights and (not bishops & LIGHT_SQUARES or not bishops & ~LIGHT_SQUARES):
+            return True
+        return not bishops and bin(knights).count("1") <= 1
+
+    def is_repetition(self) -> bool:
+        """True if the current position already occurred since the last irreversible move."""
+        history = self.history
+        stop = max(len(history) - self.halfmove, 0)
+        for i in range(len(history) - 2, stop - 1, -2):
+            if history[i] == self.hash:
+                return True
+        return False
+
+    def is_draw(self) -> bool:
+        return self.halfmove >= 100 or self.is_insufficient_material() or self.is_repetition()
+
+    # --- move generation ---
+
+    def pseudo_legal_moves(self) -> list[int]:
+        us = self.turn
+        them = us ^ 1
+        mine = self.bb[us]
+        own = self.occ[us]
+        enemy = self.occ[them]
+        occ = own | enemy
+        empty = ~occ & FULL
+        moves = []
+        append = moves.append
+
+        pawns = mine[PAWN]
+        if us == WHITE:
+            single = (pawns << 8) & empty
+            double = ((single & RANK_3) << 8) & empty
+            left = ((pawns & ~FILE_A) << 7) & enemy
+            right = ((pawns & ~FILE_H) << 9) & enemy
+            push, left_delta, right_delta, last_rank = 8, 7, 9, RANK_8
+        else:
+            single = (pawns >> 8) & empty
+            double = ((single & RANK_6) >> 8) & empty
+            left = ((pawns & ~FILE_A) >> 9) & enemy
+            right = ((pawns & ~FILE_H) >> 7) & enemy
+            push, left_delta, right_delta, last_rank = -8, -9, -7, RANK_1
+
+        for targets, delta in ((single, push), (left, left_delta), (right, right_delta)):
+            for to in squares(targets & ~last_rank):
+                append((to - delta) | (to << 6))
+            for to in squares(targets & last_rank):
+                base = (to - delta) | (to << 6)
+                for promotion in (5, 2, 4, 3):
+                    append(base | (promotion << 12))
+        for to in squares(double):
+            append((to - 2 * push) | (to << 6) | DOUBLE_FLAG)
+        if self.ep >= 0:
+            for frm in squares(PAWN_ATTACKS[them][self.ep] & pawns):
+                append(frm | (self.ep << 6) | EP_FLAG)
+
+        not_own = ~own & FULL
+        for frm in squares(mine[KNIGHT]):
+            for to in squares(KNIGHT_ATTACKS[frm] & not_own):
+                append(frm | (to << 6))
+        for frm in squares(mine[BISHOP]):
+            for to in squares(bishop_attacks(frm, occ) & not_own):
+                append(frm | (to << 6))
+        for frm in squares(mine[ROOK]):
+            for to in squares(rook_attacks(frm, occ) & not_own):
+                append(frm | (to << 6))
+        for frm in squares(mine[QUEEN]):
+            for to in squares((bishop_attacks(frm, occ) | rook_attacks(frm, occ)) & not_own):
+                append(frm | (to << 6))
+        king = mine[KING].bit_length() - 1
+        for to in squares(KING_ATTACKS[king] & not_own):
+            append(king | (to << 6))
+
+        if self.castling:
+            if us == WHITE:
+                if self.castling & CASTLE_WK and not occ & 0x60 and not self._any_attacked((4, 5, 6), them, occ):
+                    append(4 | (6 << 6) | CASTLE_FLAG)
+                if self.castling & CASTLE_WQ and not occ & 0x0E and not self._any_attacked((4, 3, 2), them, occ):
+                    append(4 | (2 << 6) | CASTLE_FLAG)
+            else:
+                if self.castling & CASTLE_BK and not occ & (0x60 << 56) and not self._any_attacked((60, 61, 62), them, occ):
+                    append(60 | (62 << 6) | CASTLE_FLAG)
+                if self.castling & CASTLE_BQ and not occ & (0x0E << 56) and not self._any_attacked((60, 59, 58), them, occ):
+                    append(60 | (58 << 6) | CASTLE_FLAG)
+        return moves
+
+    def _any_attacked(self, sqs, by, occ) -> bool:
+        for sq in sqs:
+            if self.attackers_exist(sq, by, occ):
+                return True
+        return False
+
+    def _pinned(self, king: int, us: int) -> int:
+        """Our pieces that are the only blocker between our king and an enemy slider."""
+        them = us ^ 1
+        enemy = self.bb[them]
+        snipers = (ROOK_RAYS[king] & (enemy[ROOK] | enemy[QUEEN])) | (BISHOP_RAYS[king] & (enemy[BISHOP] | enemy[QUEEN]))
+        occ = self.occ[0] | self.occ[1]
+        pinned = 0
+        for sniper in squares(snipers):
+            blockers = BETWEEN[king][sniper] & occ
+            if blockers and not blockers & (blockers - 1):
+                pinned |= blockers & self.occ[us]
+        return pinned
+
+    def legal_moves(self) -> list[int]:
+        us = self.turn
+        king = self.king_square(us)
+        in_check = self.is_attacked(king, us ^ 1)
+        pinned = self._pinned(king, us)
+        legal = []
+        for move in self.pseudo_legal_moves():
+            frm = move & 0x3F
+            # Only king moves, evasions, pinned pieces and en passant can expose the king
+            if in_check or frm == king or move & EP_FLAG or (pinned >> frm) & 1:
+                if move & CASTLE_FLAG:
+                    legal.append(move)
+                    continue
+                self.make(move)
+                ok = not self.is_attacked(self.king_square(us), us ^ 1)
+                self.unmake()
+                if not ok:
+                    continue
+            legal.append(move)
+        return legal
+
+    def has_legal_move(self) -> bool:
+        us = self.turn
+        for move in self.pseudo_legal_moves():
+            self.make(move)
+            ok = not self.is_attacked(self.king_square(us), us ^ 1)
+            self.unmake()
+            if ok:
+                return True
+        return False
+
+    # --- make / unmake ---
+
+    def make(self, move: int):
+        frm = move & 0x3F
+        to = (move >> 6) & 0x3F
+        us = self.turn
+        them = us ^ 1
+        mailbox = self.mailbox
+        piece = mailbox[frm]
+        kind = piece % 6
+        captured = mailbox[to]
+        h = self.hash
+
+        self.undo.append((move, captured, self.castling, self.ep, self.ep_hashed, self.halfmove, h))
+        self.history.append(h)
+
+        mine = self.bb[us]
+        frm_bit = 1 << frm
+        to_bit = 1 << to
+
+        if captured != EMPTY:
+            ckind = captured % 6
+            self.bb[them][ckind] ^= to_bit
+            self.occ[them] ^= to_bit
+            h ^= Z_PIECE[them][ckind][to]
+        elif move & EP_FLAG:
+            cap_sq = to - 8 if us == WHITE else to + 8
+            cap_bit = 1 << cap_sq
+            self.bb[them][PAWN] ^= cap_bit
+            self.occ[them] ^= cap_bit
+            mailbox[cap_sq] = EMPTY
+            h ^= Z_PIECE[them][PAWN][cap_sq]
+
+        mine[kind] ^= frm_bit
+        self.occ[us] ^= frm_bit | to_bit
+        mailbox[frm] = EMPTY
+        h ^= Z_PIECE[us][kind][frm]
+        promotion = (move >> 12) & 0x7
+        if promotion:
+            kind = promotion - 1
+        mine[kind] |= to_bit
+        mailbox[to] = us * 6 + kind
+        h ^= Z_PIECE[us][kind][to]
+
+        if move & CASTLE_FLAG:
+            rook_from, rook_to = CASTLE_ROOK_MOVES[to]
+            mine[ROOK] ^= (1 << rook_from) | (1 << rook_to)
+            self.occ[us] ^= (1 << rook_from) | (1 << rook_to)
+            mailbox[rook_from] = EMPTY
+            mailbox[rook_to] = us * 6 + ROOK
+            h ^= Z_PIECE[us][ROOK][rook_from] ^ Z_PIECE[us][ROOK][rook_to]
+
+        castling = self.castling & CASTLE_KEEP[frm] & CASTLE_KEEP[to]
+        if castling != self.castling:
+            h ^= Z_CASTLE[self.castling] ^ Z_CASTLE[castling]
+            self.castling = castling
+
+        if self.ep_hashed:
+            h ^= Z_EP[self.ep & 7]
+        self.ep = -1
+        self.ep_hashed = False
+        if move & DOUBLE_FLAG:
+            ep = (frm + to) >> 1
+            self.ep = ep
+            if PAWN_ATTACKS[us][ep] & self.bb[them][PAWN]:
+                self.ep_hashed = True
+                h ^= Z_EP[ep & 7]
+
+        if kind == PAWN or captured != EMPTY or promotion:
+            self.halfmove = 0
+        else:
+            self.halfmove += 1
+        self.turn = them
+        self.hash = h ^ Z_WHITE_TURN
+
+    def unmake(self):
+        move, captured, castling, ep, ep_hashed, halfmove, h = self.undo.pop()
+        self.history.pop()
+        frm = move & 0x3F
+        to = (move >> 6) & 0x3F
+        them = self.turn
+        us = them ^ 1
+        mailbox = self.mailbox
+        mine = self.bb[us]
+        frm_bit = 1 << frm
+        to_bit = 1 << to
+
+        kind = mailbox[to] % 6
+        mine[kind] ^= to_bit
+        if move >> 12 & 0x7:
+            kind = PAWN
+        mine[kind] |= frm_bit
+        self.occ[us] ^= frm_bit | to_bit
+        mailbox[frm] = us * 6 + kind
+        mailbox[to] = captured
+
+        if captured != EMPTY:
+            self.bb[them][captured % 6] |= to_bit
+            self.occ[them] |= to_bit
+        elif move & EP_FLAG:
+            cap_sq = to - 8 if us == WHITE else to + 8
+            cap_bit = 1 << cap_sq
+            self.bb[them][PAWN] |= cap_bit
+            self.occ[them] |= cap_bit
+            mailbox[cap_sq] = them * 6 + PAWN
+
+        if move & CASTLE_FLAG:
+            rook_from, rook_to = CASTLE_ROOK_MOVES[to]
+            mine[ROOK] ^= (1 << rook_from) | (1 << rook_to)
+            self.occ[us] ^= (1 << rook_from) | (1 << rook_to)
+            mailbox[rook_to] = EMPTY
+            mailbox[rook_from] = us * 6 + ROOK
+
+        self.turn = us
+        self.castling = castling
+        self.ep = ep
+        self.ep_hashed = ep_hashed
+        self.halfmove = halfmove
+        self.hash = h
+
+    def make_null(self):
+        h = self.hash
+        self.undo.append((0, EMPTY, self.castling, self.ep, self.ep_hashed, self.halfmove, h))
+        self.history.append(h)
+        if self.ep_hashed:
+            h ^= Z_EP[self.ep & 7]
+        self.ep = -1
+        self.ep_hashed = False
+        self.halfmove += 1
+        self.turn ^= 1
+        self.hash = h ^ Z_WHITE_TURN
+
+    def unmake_null(self):
+        _, _, castling, ep, ep_hashed, halfmove, h = self.undo.pop()
+        self.history.pop()
+        self.turn ^= 1
+        self.castling = castling
+        self.ep = ep
+        self.ep_hashed = ep_hashed
+        self.halfmove = halfmove
+        self.hash = h
+
+
+def perft(pos: Position, depth: int) -> int:
+    """Counts leaf nodes, making every move (no bulk counting) so it exercises make/unmake like the search does."""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in pos.legal_moves():
+        pos.make(move)
+        nodes += perft(pos, depth - 1)
+        pos.unmake()
+    return nodes
@@ -1,3 +1,4 @@
+import io
 import chess
 import chess.pgn
 import torch
@@ -24,6 +25,25 @@ def board_to_tensor(board: chess.Board) -> torch.Tensor:
             tensor[channel, rank, file] = 1
     return tensor
 
+def open_pgn(pgn_file_path, offset=0, binary=False):
+    """
+    Opens a .pgn or .pgn.zst file as a stream, decompressing on the fly.
+    `offset` is a byte offset into the decompressed data to start reading at.
+    """
+    if str(pgn_file_path).endswith('.zst'):
+        f = open(pgn_file_path, 'rb')
+        raw = zstandard.ZstdDecompressor().stream_reader(f, closefd=True)
+        if offset:
+            raw.seek(offset)
+        stream = io.BufferedReader(raw)
+    else:
+        stream = open(pgn_file_path, 'rb')
+        if offset:
+            stream.seek(offset)
+    if binary:
+        return stream
+    return io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+
 def process_game(game):
     """
     Generator function that yields (tensor, result_value) pairs for each
@@ -42,24 +62,29 @@ def process_game(game):
             tensor = board_to_tensor(board)
             yield tensor, result_value
 
-def parse_database(pgn_file_path, max_games=None):
+def parse_database(pgn_file_path, max_games=None, shard=0, num_shards=1):
     """
     Parses a PGN database and yields training data.
+    With num_shards > 1 only games whose index is congruent to shard are
+    parsed (the rest are skipped without parsing), so each training process
+    sees a disjoint slice of the database.
     """
-    with open(pgn_file_path, 'rb') as f:
-        dctx = zstandard.ZstdDecompressor(pgn_file_path)
-        with dctx.stream_reader(f) as reader:
-            pgn = chess.pgn.read_game(reader)
-            game_count = 0
-            while True:
-                if max_games and game_count >= max_games:
+    with open_pgn(pgn_file_path) as pgn:
+        game_count = 0
+        while True:
+            if max_games and game_count >= max_games:
+                break
+            if game_count % num_shards != shard:
+                if not chess.pgn.skip_game(pgn):
+                    break
+                game_count += 1
+                continue
+            try:
+                game = chess.pgn.read_game(pgn)
+                if game is None:
                     break
-                try:
-                    game = chess.pgn.read_game(pgn)
-                    if game is None:
-                        break
-                    yield from process_game(game)
-                    game_count += 1
-                except (ValueError, IndexError) as e:
-                    print(f"Skipping a malformed game. Error: {e}")
-                    continue
\ No newline at end of file
+                game_count += 1
+                yield from process_game(game)
+            except (ValueError, IndexError) as e:
+                print(f"Skipping a malformed game. Error: {e}")
+                continue
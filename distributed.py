@@ -0,0 +1,380 @@
+"""
+Root-split analysis across machines.
+
+A Coordinator listens on a TCP port and worker processes (one ChessAI each,
+on any host) connect to it. For every iteration of iterative deepening the
+coordinator searches the previous best move first with a full window, then
+hands out the remaining root moves one at a time with a null window around
+the best score; moves that fail high are re-searched with an open window.
+Idle workers pull the next move, and once the queue is empty they duplicate
+the oldest move still in flight elsewhere, so a slow or stalled host can't
+hold up the iteration (the first result wins). If a worker disconnects, its
+move goes back on the queue.
+
+Messages are single-line JSON objects terminated by a newline.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import queue
+import socket
+import threading
+import time
+
+import chess
+
+# Same values as main.py, which isn't imported here so the coordinator doesn't need torch
+MATE_SCORE = 10_000_000
+INFTY = 10_000_000
+DEFAULT_PORT = 29600
+RECONNECT_DELAY = 1.0
+TASK_GRACE = 5.0  # seconds past a task's time budget before its worker is considered lost
+
+
+def send_message(sock: socket.socket, message: dict):
+    sock.sendall((json.dumps(message) + "\n").encode())
+
+
+def read_messages(sock: socket.socket):
+    """Yields messages from a socket until it is closed."""
+    buffer = b""
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            return
+        buffer += data
+        while b"\n" in buffer:
+            line, buffer = buffer.split(b"\n", 1)
+            if line.strip():
+                yield json.loads(line)
+
+
+class WorkerConnection:
+    def __init__(self, sock: socket.socket, address, name: str):
+        self.sock = sock
+        self.address = address
+        self.name = name
+        self.task = None  # task id currently assigned
+        self.task_deadline = None
+        self.alive = True
+        self._send_lock = threading.Lock()
+
+    def send(self, message: dict) -> bool:
+        try:
+            with self._send_lock:
+                send_message(self.sock, message)
+            return True
+        except OSError:
+            return False
+
+    def close(self):
+        self.alive = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class Coordinator:
+    """Accepts worker connections and runs distributed root-split searches."""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT):
+        self.server = socket.create_server((host, port), reuse_port=False)
+        self.port = self.server.getsockname()[1]
+        self.workers: list[WorkerConnection] = []
+        self.events = queue.Queue()
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        threading.Thread(target=self._accept_loop, name="coordinator-accept", daemon=True).start()
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, address = self.server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._reader, args=(sock, address), daemon=True).start()
+
+    def _reader(self, sock: socket.socket, address):
+        worker = None
+        try:
+            for message in read_messages(sock):
+                if message["type"] == "hello" and worker is None:
+                    worker = WorkerConnection(sock, address, message.get("name") or f"{address[0]}:{address[1]}")
+                    with self._lock:
+                        self.workers.append(worker)
+                    print(f"Worker {worker.name} connected")
+                    self.events.put(("idle", worker, None))
+                elif message["type"] == "result" and worker is not None:
+                    self.events.put(("result", worker, message))
+        except (OSError, ValueError):
+            pass
+        if worker is not None:
+            worker.alive = False
+            with self._lock:
+                if worker in self.workers:
+                    self.workers.remove(worker)
+            print(f"Worker {worker.name} disconnected")
+            self.events.put(("lost", worker, None))
+        else:
+            sock.close()
+
+    def wait_for_workers(self, count: int, timeout: float) -> int:
+        deadline = time.time() + timeout
+        while time.time() < deadline and len(self.workers) < count:
+            time.sleep(0.05)
+        return len(self.workers)
+
+    def close(self):
+        self.server.close()
+        with self._lock:
+            workers = list(self.workers)
+        for worker in workers:
+            worker.close()
+
+    def _run_tasks(self, tasks: list[dict], on_result, deadline: float, prepare=None) -> bool:
+        """
+        Runs tasks on the connected workers until all are done. on_result(task,
+        message) may return follow-up tasks, which go to the front of the
+        queue; prepare(task), if given, can update a task just before it is
+        sent. Returns False if the deadline passed first.
+        """
+        pending = list(tasks)
+        running: dict[int, tuple[dict, list[WorkerConnection], float]] = {}
+
+        def dispatch():
+            for worker in [w for w in list(self.workers) if w.alive and w.task is None]:
+                if pending:
+                    task = pending.pop(0)
+                    if prepare is not None:
+                        task = prepare(task)
+                    running[task["id"]] = (task, [], time.time())
+                elif running:
+                    # Steal: duplicate the longest-running task that only one worker has
+                    candidates = [(started, t) for t, owners, started in running.values() if len(owners) < 2]
+                    if not candidates:
+                        return
+                    task = min(candidates, key=lambda c: c[0])[1]
+                else:
+                    return
+                message = dict(task, type="task", time=max(0.05, deadline - time.time()))
+                if worker.send(message):
+                    worker.task = task["id"]
+                    worker.task_deadline = time.time() + message["time"] + TASK_GRACE
+                    running[task["id"]][1].append(worker)
+                elif not running[task["id"]][1]:
+                    del running[task["id"]]
+                    pending.insert(0, task)
+
+        dispatch()
+        while pending or running:
+            if time.time() > deadline:
+                return False
+            try:
+                kind, worker, message = self.events.get(timeout=0.05)
+            except queue.Empty:
+                kind = None
+            if kind == "result":
+                task_id = message["id"]
+                worker.task = None
+                if task_id in running and not message["complete"]:
+                    # Ran out of time on the worker; the deadline is about to stop us too
+                    task, owners, _ = running[task_id]
+                    if worker in owners:
+                        owners.remove(worker)
+                    if not owners:
+                        del running[task_id]
+                        pending.insert(0, task)
+                elif task_id in running:
+                    # Duplicates still running elsewhere finish on their own and are ignored
+                    task, owners, _ = running.pop(task_id)
+                    for follow_up in reversed(on_result(task, message) or []):
+                        pending.insert(0, follow_up)
+            elif kind == "lost":
+                task_id, worker.task = worker.task, None
+                if task_id in running and worker in running[task_id][1]:
+                    task, owners, _ = running[task_id]
+                    owners.remove(worker)
+                    if not owners:
+                        del running[task_id]
+                        pending.insert(0, task)
+            # Workers that overran their time budget by a wide margin are treated as dead
+            for w in list(self.workers):
+                if w.task is not None and w.task_deadline and time.time() > w.task_deadline:
+                    print(f"Worker {w.name} timed out")
+                    w.close()
+            dispatch()
+        return True
+
+    def new_task(self, fen: str, move: str, depth: int, alpha: int, beta: int) -> dict:
+        return {"id": next(self._task_ids), "fen": fen, "move": move, "depth": depth, "alpha": alpha, "beta": beta}
+
+    def analyse(self, board: chess.Board, max_depth: int = 10, move_time: float = 30.0):
+        """
+        Iterative deepening over the root with the moves split across workers.
+        Returns (move, score, pv, depth, nodes) for the deepest completed
+        iteration; scores are from the side to move's point of view.
+        """
+        if not self.workers:
+            raise RuntimeError("No workers connected")
+        fen = board.fen()
+        start = time.time()
+        deadline = start + move_time
+        # Captures first until the first iteration has scores to sort by
+        root_moves = [m.uci() for m in sorted(board.legal_moves, key=board.is_capture, reverse=True)]
+        if not root_moves:
+            raise ValueError("Position has no legal moves")
+        scores = {m: -INFTY for m in root_moves}
+        best = (root_moves[0], -INFTY, [root_moves[0]])
+        completed_depth = 0
+        nodes = 0
+
+        for depth in range(1, max_depth + 1):
+            # Best move so far first, the others in order of their last score
+            root_moves.sort(key=lambda m: (m == best[0], scores[m]), reverse=True)
+            state = {"alpha": -INFTY, "best": None}
+
+            def on_result(task, message):
+                nonlocal nodes
+                nodes += message["nodes"]
+                score = message["score"]
+                scores[task["move"]] = score
+                alpha = state["alpha"]
+                if score >= task["beta"]:
+                    # Fail high is only a lower bound. If the best score has risen since the
+                    # task was sent, check against it with a null window again, otherwise
+                    # search it with an open window to get the exact score.
+                    beta = alpha + 1 if task["alpha"] < alpha else INFTY
+                    return [self.new_task(fen, task["move"], depth, alpha, beta)]
+                if score > task["alpha"] and score > alpha:
+                    state["alpha"] = score
+                    state["best"] = (task["move"], score, message["pv"])
+                return []
+
+            def prepare(task):
+                # Null windows are set at the best score known when the move is handed out
+                alpha = state["alpha"]
+                if task["beta"] == task["alpha"] + 1 and task["alpha"] < alpha:
+                    return dict(task, alpha=alpha, beta=alpha + 1)
+                return task
+
+            first = self.new_task(fen, root_moves[0], depth, -INFTY, INFTY)
+            if not self._run_tasks([first], on_result, deadline):
+                break
+            alpha = state["alpha"]
+            rest = [self.new_task(fen, m, depth, alpha, alpha + 1) for m in root_moves[1:]]
+            if not self._run_tasks(rest, on_result, deadline, prepare):
+                break
+            best = state["best"]
+            completed_depth = depth
+            print(f"depth {depth}: {best[0]} score {best[1]} nodes {nodes} time {time.time() - start:.2f}s "
+                  f"({len(self.workers)} workers)")
+            if abs(best[1]) >= MATE_SCORE - 1000:
+                break
+        return best[0], best[1], best[2], completed_depth, nodes
+
+
+def _worker_main(host: str, port: int, model_path: str, variant: str, name: str, connect_timeout: float):
+    import torch
+    from main import ChessAI
+
+    torch.set_num_threads(1)
+    ai = ChessAI(book_path=None, model_path=model_path, model_variant=variant)
+    ai.warm_up()
+    give_up = time.time() + connect_timeout
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+        except OSError:
+            if time.time() > give_up:
+                print(f"Worker {name}: could not reach {host}:{port}")
+                return
+            time.sleep(RECONNECT_DELAY)
+            continue
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            send_message(sock, {"type": "hello", "name": name})
+            for message in read_messages(sock):
+                if message["type"] != "task":
+                    continue
+                board = chess.Board(message["fen"])
+                score, pv, complete = ai.analyse_move(board, chess.Move.from_uci(message["move"]), message["depth"],
+                                               message["alpha"], message["beta"], message["time"])
+                send_message(sock, {"type": "result", "id": message["id"], "score": score,
+                                    "pv": [m.uci() for m in pv], "nodes": ai.nodes, "complete": complete})
+        except (OSError, ValueError):
+            pass
+        finally:
+            sock.close()
+        # The coordinator went away; try to rejoin it for a while
+        give_up = time.time() + connect_timeout
+
+
+def run_worker(host: str, port: int = DEFAULT_PORT, model_path: str = "chess_net.pth", variant: str = "chessnet",
+               name: str | None = None, connect_timeout: float = 30.0):
+    """Connects to a coordinator and searches the root moves it sends until it goes away."""
+    _worker_main(host, port, model_path, variant, name or f"{socket.gethostname()}-{os.getpid()}", connect_timeout)
+
+
+def start_local_workers(count: int, port: int, model_path: str, variant: str) -> list:
+    """Worker processes on this machine, standing in for separate hosts."""
+    ctx = mp.get_context("spawn")
+    processes = []
+    for i in range(count):
+        proc = ctx.Process(target=_worker_main, args=("127.0.0.1", port, model_path, variant, f"local-{i}", 10.0),
+                           daemon=True)
+        proc.start()
+        processes.append(proc)
+    return processes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed root-split analysis.")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    coordinator = sub.add_parser("coordinator", help="listen for workers and analyse a position")
+    coordinator.add_argument("--fen", default=chess.STARTING_FEN)
+    coordinator.add_argument("--depth", type=int, default=6)
+    coordinator.add_argument("--time", type=float, default=60.0)
+    coordinator.add_argument("--host", default="0.0.0.0")
+    coordinator.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator.add_argument("--workers", type=int, default=1, help="wait for this many workers before starting")
+    coordinator.add_argument("--local-workers", type=int, default=0, help="also start this many workers locally")
+    coordinator.add_argument("--model", default="chess_net.pth")
+    coordinator.add_argument("--variant", default="chessnet")
+
+    worker = sub.add_parser("worker", help="connect to a coordinator and search the moves it sends")
+    worker.add_argument("--host", default="127.0.0.1")
+    worker.add_argument("--port", type=int, default=DEFAULT_PORT)
+    worker.add_argument("--model", default="chess_net.pth")
+    worker.add_argument("--variant", default="chessnet")
+    worker.add_argument("--name", default=None)
+    args = parser.parse_args()
+
+    if args.mode == "worker":
+        run_worker(args.host, args.port, args.model, args.variant, args.name)
+        return
+
+    coord = Coordinator(args.host, args.port)
+    processes = start_local_workers(args.local_workers, coord.port, args.model, args.variant)
+    try:
+        wanted = max(args.workers, args.local_workers)
+        connected = coord.wait_for_workers(wanted, timeout=120.0)
+        print(f"{connected} worker(s) connected, analysing {args.fen}")
+        start = time.time()
+        move, score, pv, depth, nodes = coord.analyse(chess.Board(args.fen), args.depth, args.time)
+        elapsed = time.time() - start
+        print(f"Best move {move}, score {score}, depth {depth}, pv {' '.join(pv)}")
+        print(f"{nodes} nodes in {elapsed:.2f}s ({nodes / max(elapsed, 1e-9):.0f} nps)")
+    finally:
+        coord.close()
+        for proc in processes:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
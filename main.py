@@ -2,15 +2,20 @@
 import chess
 import chess.polyglot
 import torch
-from model import ChessNet
+from model import build_model, DEFAULT_VARIANT
 from data_processor import board_to_tensor
+from persistent_cache import PersistentCache
+from bitboard import Position, WHITE, EMPTY, MOVE_MASK, move_to_chess, squares
+import math
 import random
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 
 MATE_SCORE = 10_000_000
 INFTY = 10_000_000
 DRAW_SCORE = 0
+MAX_PLY = 128
+ASPIRATION_WINDOW = 50
 
 def is_mate_score(score: int) -> bool:
     return abs(score) >= MATE_SCORE - 1000
@@ -30,6 +35,15 @@ def phase_score(board: chess.Board) -> int:
 def mirror_index(sq: int) -> int:
     return chess.square_mirror(sq)
 
+def position_to_tensor(pos: Position) -> torch.Tensor:
+    """Same (12, 8, 8) encoding as board_to_tensor, read straight from the bitboards."""
+    tensor = torch.zeros(12 * 64)
+    indices = [channel * 64 + sq
+               for channel in range(12)
+               for sq in squares(pos.bb[channel // 6][channel % 6])]
+    tensor[indices] = 1
+    return tensor.view(12, 8, 8)
+
 PIECE_VALUES_MG = {
     chess.PAWN:   100,
     chess.KNIGHT: 320,
@@ -128,13 +142,79 @@ class TTEntry:
     depth: int
     score: int
     flag: int
-    move: chess.Move | None
+    move: int  # bitboard move, 0 for none
+
+@dataclass
+class SearchResult:
+    move: chess.Move
+    score: int
+    pv: list[chess.Move]
+    depth: int
+    nodes: int
+
+@dataclass
+class SearchParams:
+    """
+    Tunable pruning and reduction settings for negamax. Margins are in
+    centipawns per ply of remaining depth.
+    """
+    null_move: bool = True
+    null_move_min_depth: int = 3
+    null_move_reduction: int = 2
+
+    reverse_futility: bool = True
+    rfp_depth: int = 3
+    rfp_margin: int = 120
+
+    futility: bool = True
+    futility_depth: int = 2
+    futility_margin: int = 150
+
+    late_move_pruning: bool = True
+    lmp_depth: int = 3
+    lmp_base: int = 4
+
+    lmr: bool = True
+    lmr_min_depth: int = 3
+    lmr_min_move: int = 3
+    lmr_base: float = 0.75
+    lmr_divisor: float = 2.25
+
+    @classmethod
+    def from_string(cls, spec: str) -> "SearchParams":
+        """Builds params from overrides such as "lmr=0,futility_margin=200"."""
+        return cls.from_options(dict(part.split('=', 1) for part in spec.split(',') if part))
+
+    @classmethod
+    def from_options(cls, options: dict[str, str]) -> "SearchParams":
+        types = {f.name: f.type for f in fields(cls)}
+        values = {}
+        for name, raw in options.items():
+            name = name.strip()
+            if name not in types:
+                raise ValueError(f"Unknown search parameter: {name}")
+            kind = types[name]
+            if kind in (bool, "bool"):
+                values[name] = str(raw).strip().lower() in ("1", "true", "yes", "on")
+            elif kind in (int, "int"):
+                values[name] = int(raw)
+            else:
+                values[name] = float(raw)
+        return cls(**values)
+
+    @classmethod
+    def disabled(cls) -> "SearchParams":
+        """No pruning or reductions at all, for measuring what they save."""
+        return cls(null_move=False, reverse_futility=False, futility=False,
+                   late_move_pruning=False, lmr=False)
 
 class ChessAI:
-    def __init__(self, book_path: str | None = None, model_path: str = "chess_net.pth"):
+    def __init__(self, book_path: str | None = None, model_path: str = "chess_net.pth",
+                 cache_path: str | None = None, cache_readonly: bool = False, cache_mb: float = 64,
+                 search_params: SearchParams | None = None, model_variant: str = DEFAULT_VARIANT):
 
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = ChessNet().to(self.device)
+        self.model = build_model(model_variant).to(self.device)
         try:
             self.model.load_state_dict(torch.load(model_path, map_location=self.device))
             self.model.eval() 
@@ -145,42 +225,102 @@ class ChessAI:
         # ----------------------------------
 
         self.tt: dict[int, TTEntry] = {}
-        self.killer_moves: dict[int, list[chess.Move]] = {}
-        self.history_heuristic: dict[tuple[int, int], int] = {}
+        self.killer_moves: dict[int, list[int]] = {}
+        self.history_heuristic: dict[int, int] = {}
+        self.cache = PersistentCache(cache_path, model_path, max_mb=cache_mb, readonly=cache_readonly) if cache_path else None
+
+        self.book = None
+        if book_path:
+            try:
+                self.book = chess.polyglot.open_reader(book_path)
+            except FileNotFoundError:
+                print(f"Warning: Opening book not found at {book_path}.")
 
         self.hard_time_limit = 3.0
         self.soft_time_limit = 2.0
+        self.node_limit: int | None = None
+        self.set_search_params(search_params or SearchParams())
+        self.nodes = 0
+        self.pv_table: list[list[int]] = [[] for _ in range(MAX_PLY + 1)]
 
 
-    def tt_key(self, board: chess.Board) -> int:
-        try:
-            return board.transposition_key()
-        except Exception:
-            try:
-                return board._transposition_key()
-            except Exception:
-                return hash(board.board_fen()) ^ hash(board.castling_rights) ^ hash(board.ep_square)
+    def set_search_params(self, params: SearchParams):
+        self.params = params
+        self.lmr_table = [[0] * 64 for _ in range(64)]
+        for depth in range(1, 64):
+            for index in range(1, 64):
+                self.lmr_table[depth][index] = int(params.lmr_base + math.log(depth) * math.log(index) / params.lmr_divisor)
+
+    def warm_up(self):
+        """
+        Runs a dummy forward pass so the first real request doesn't pay for
+        lazy initialisation inside torch.
+        """
+        if self.model is None:
+            return
+        with torch.no_grad():
+            self.model(torch.zeros(1, 12, 8, 8, device=self.device))
 
+    def time_up(self, start_time: float, limit: float) -> bool:
+        if self.node_limit is not None and self.nodes >= self.node_limit:
+            return True
+        return time.time() - start_time > limit
 
     def evaluate(self, board: chess.Board) -> int:
         """
-        Evaluates the board using the trained neural network.
+        Evaluates the board using the trained neural network, from the side
+        to move's point of view.
         """
-        if board.is_checkmate():
-            return -MATE_SCORE + 1 if board.turn == chess.WHITE else MATE_SCORE - 1
-        if board.is_stalemate() or board.is_insufficient_material() or board.can_claim_fifty_moves():
+        return self.evaluate_position(Position.from_board(board))
+
+    def evaluate_position(self, pos: Position) -> int:
+        """evaluate() for the search's internal position."""
+        if not pos.has_legal_move():
+            return -MATE_SCORE + 1 if pos.is_check() else DRAW_SCORE
+        if pos.is_insufficient_material() or pos.halfmove >= 100:
             return DRAW_SCORE
-        
+
         if self.model is None:
-            return 0 
+            return 0
+
+        if self.cache is not None:
+            cached = self.cache.probe_eval(pos.hash)
+            if cached is not None:
+                return cached
 
         with torch.no_grad():
-            tensor = board_to_tensor(board).unsqueeze(0).to(self.device)
-            value = self.model(tensor).item() 
+            tensor = position_to_tensor(pos).unsqueeze(0).to(self.device)
+            value = self.model(tensor).item()
+
+        score = int(value * 600)
+        score = score if pos.turn == WHITE else -score
+
+        if self.cache is not None:
+            self.cache.store_eval(pos.hash, score)
+        return score
 
-        score = int(value * 600) 
+    def evaluate_batch(self, boards: list[chess.Board]) -> list[int]:
+        """
+        Evaluates several positions with a single forward pass of the network.
+        Scores match what evaluate() would return for each board.
+        """
+        scores = [0] * len(boards)
+        pending = []
+        for i, board in enumerate(boards):
+            if self.model is None or board.is_checkmate() or board.is_stalemate() \
+                    or board.is_insufficient_material() or board.can_claim_fifty_moves():
+                scores[i] = self.evaluate(board)
+            else:
+                pending.append(i)
 
-        return score if board.turn == chess.WHITE else -score
+        if pending:
+            with torch.no_grad():
+                tensors = torch.stack([board_to_tensor(boards[i]) for i in pending]).to(self.device)
+                values = self.model(tensors).view(-1).tolist()
+            for i, value in zip(pending, values):
+                score = int(value * 600)
+                scores[i] = score if boards[i].turn == chess.WHITE else -score
+        return scores
 
     def _rooks_file_bonus(self, board: chess.Board, color: bool) -> int:
         bonus = 0
@@ -215,40 +355,42 @@ class ChessAI:
 
     MVV_LVA_SCORES = None
 
-    def mvv_lva(self, board: chess.Board, move: chess.Move) -> int:
+    def mvv_lva(self, pos: Position, move: int) -> int:
         if self.MVV_LVA_SCORES is None:
             order = [None, 100, 300, 325, 500, 900, 20000]
             self.MVV_LVA_SCORES = [[0]*7 for _ in range(7)]
             for v in range(1,7):
                 for a in range(1,7):
                     self.MVV_LVA_SCORES[v][a] = order[v] * 10 - order[a]
-        victim = board.piece_at(move.to_square)
-        attacker = board.piece_at(move.from_square)
-        if victim and attacker:
-            return self.MVV_LVA_SCORES[victim.piece_type][attacker.piece_type]
+        victim = pos.captured_kind(move)
+        attacker = pos.piece_kind_at(move & 0x3F)
+        if victim != EMPTY and attacker != EMPTY:
+            return self.MVV_LVA_SCORES[victim + 1][attacker + 1]
         return 0
 
-    def order_moves(self, board: chess.Board, moves, tt_move: chess.Move | None, depth: int):
+    def order_moves(self, pos: Position, moves: list[int], tt_move: int, depth: int):
         killers = self.killer_moves.get(depth, [])
         hist = self.history_heuristic
+        tt_code = tt_move & MOVE_MASK
 
         scored = []
         for mv in moves:
             score = 0
-            if tt_move and mv == tt_move:
+            if tt_code and mv & MOVE_MASK == tt_code:
                 score += 10_000_000
-            if board.is_capture(mv) or board.gives_check(mv):
-                score += 100_000 + self.mvv_lva(board, mv)
+            if pos.is_capture(mv) or pos.gives_check(mv):
+                score += 100_000 + self.mvv_lva(pos, mv)
             if mv in killers:
                 score += 50_000
-            score += hist.get((mv.from_square, mv.to_square), 0)
-            if mv.promotion:
-                score += 150_000 + (mv.promotion * 10)
+            score += hist.get(mv & 0xFFF, 0)
+            promotion = (mv >> 12) & 0x7
+            if promotion:
+                score += 150_000 + (promotion * 10)
             scored.append((score, mv))
         scored.sort(key=lambda x: x[0], reverse=True)
         return [m for _, m in scored]
 
-    def store_killer(self, depth: int, move: chess.Move):
+    def store_killer(self, depth: int, move: int):
         arr = self.killer_moves.setdefault(depth, [])
         if move not in arr:
             arr.insert(0, move)
@@ -256,22 +398,21 @@ class ChessAI:
                 arr.pop()
 
 
-    def quiescence(self, board: chess.Board, alpha: int, beta: int, ply: int) -> int:
-        stand = self.evaluate(board)
+    def quiescence(self, pos: Position, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        stand = self.evaluate_position(pos)
         if stand >= beta:
             return beta
         if alpha < stand:
             alpha = stand
 
-        moves = [m for m in board.legal_moves if board.is_capture(m) or board.gives_check(m)]
-        moves = self.order_moves(board, moves, None, ply)
+        moves = [m for m in pos.legal_moves() if pos.is_capture(m) or pos.gives_check(m)]
+        moves = self.order_moves(pos, moves, 0, ply)
 
         for mv in moves:
-            if not board.is_capture(mv) and not board.gives_check(mv):
-                continue
-            board.push(mv)
-            score = -self.quiescence(board, -beta, -alpha, ply+1)
-            board.pop()
+            pos.make(mv)
+            score = -self.quiescence(pos, -beta, -alpha, ply+1)
+            pos.unmake()
 
             if score >= beta:
                 return beta
@@ -279,62 +420,114 @@ class ChessAI:
                 alpha = score
         return alpha
 
-    def negamax(self, board: chess.Board, depth: int, alpha: int, beta: int, ply: int, start_time: float) -> int:
-        if time.time() - start_time > self.hard_time_limit:
-            return self.evaluate(board)
+    def negamax(self, pos: Position, depth: int, alpha: int, beta: int, ply: int, start_time: float) -> int:
+        self.nodes += 1
+        if ply < MAX_PLY:
+            self.pv_table[ply] = []
+        if self.time_up(start_time, self.hard_time_limit):
+            return self.evaluate_position(pos)
+        if pos.halfmove >= 100 or pos.is_repetition() or pos.is_insufficient_material():
+            return DRAW_SCORE
 
-        key = self.tt_key(board)
+        key = pos.hash
         tt_entry = self.tt.get(key)
 
+        use_cache = self.cache is not None and depth >= self.cache.min_depth
+        if use_cache and tt_entry is None:
+            stored = self.cache.probe_tt(key)
+            if stored is not None:
+                tt_entry = TTEntry(*stored)
+                self.tt[key] = tt_entry
+
         if tt_entry and tt_entry.depth >= depth:
             if tt_entry.flag == 0:
                 return tt_entry.score
-            elif tt_entry.flag == -1:
-                alpha = max(alpha, tt_entry.score)
-            elif tt_entry.flag == 1:
+            elif tt_entry.flag == -1:  # failed low: upper bound
                 beta = min(beta, tt_entry.score)
+            elif tt_entry.flag == 1:  # failed high: lower bound
+                alpha = max(alpha, tt_entry.score)
             if alpha >= beta:
                 return tt_entry.score
 
-        if depth <= 0 or board.is_game_over():
-            return self.quiescence(board, alpha, beta, ply)
-
-        if depth >= 3 and not board.is_check() and any(board.pieces(pt, board.turn) for pt in [chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT]):
-            board.push(chess.Move.null())
-            score = -self.negamax(board, depth-2, -beta, -beta+1, ply+1, start_time)
-            board.pop()
+        if depth <= 0:
+            return self.quiescence(pos, alpha, beta, ply)
+
+        params = self.params
+        in_check = pos.is_check()
+        pv_node = beta - alpha > 1
+
+        moves = pos.legal_moves()
+        if not moves:
+            return -MATE_SCORE + 1 if in_check else DRAW_SCORE
+
+        static_eval = None
+        if not in_check and not pv_node and (
+                (params.null_move and depth >= params.null_move_min_depth)
+                or depth <= max(params.rfp_depth, params.futility_depth)):
+            static_eval = self.evaluate_position(pos)
+
+        # Reverse futility (static null move): far enough above beta that no move will drop below it
+        if params.reverse_futility and static_eval is not None and depth <= params.rfp_depth \
+                and not is_mate_score(beta) and static_eval - params.rfp_margin * depth >= beta:
+            return static_eval
+
+        if params.null_move and static_eval is not None and static_eval >= beta and not is_mate_score(beta) \
+                and depth >= params.null_move_min_depth and pos.has_non_pawn_material(pos.turn):
+            pos.make_null()
+            score = -self.negamax(pos, depth-1-params.null_move_reduction, -beta, -beta+1, ply+1, start_time)
+            pos.unmake_null()
             if score >= beta:
                 return score
 
-        tt_move = tt_entry.move if tt_entry else None
+        # Futility: quiet moves can't raise a static eval this far below alpha
+        futile = params.futility and static_eval is not None and depth <= params.futility_depth \
+            and not is_mate_score(alpha) and static_eval + params.futility_margin * depth <= alpha
+        lmp_limit = params.lmp_base + depth * depth \
+            if params.late_move_pruning and not pv_node and not in_check and depth <= params.lmp_depth else None
 
-        moves = list(board.legal_moves)
-        moves = self.order_moves(board, moves, tt_move, ply)
+        tt_move = tt_entry.move if tt_entry else 0
+        moves = self.order_moves(pos, moves, tt_move, ply)
 
         best_score = -INFTY
-        best_move = None
+        best_move = 0
         original_alpha = alpha
 
         for i, mv in enumerate(moves):
-            board.push(mv)
+            capture = pos.is_capture(mv)
+            pos.make(mv)
+            quiet = not capture and not (mv >> 12) & 0x7 and not pos.is_check()
+            if quiet and best_move:
+                if futile or (lmp_limit is not None and i >= lmp_limit):
+                    pos.unmake()
+                    continue
+
             new_depth = depth - 1
-            if i >= 4 and depth >= 3 and not board.is_capture(mv) and not board.gives_check(mv):
-                score = -self.negamax(board, new_depth-1, -alpha-1, -alpha, ply+1, start_time)
+            if i == 0:
+                score = -self.negamax(pos, new_depth, -beta, -alpha, ply+1, start_time)
             else:
-                score = -self.negamax(board, new_depth, -beta, -alpha, ply+1, start_time)
-            if score > alpha and score < beta and i > 0:
-                score = -self.negamax(board, new_depth, -beta, -alpha, ply+1, start_time)
-            board.pop()
+                reduction = 0
+                if params.lmr and quiet and not in_check and depth >= params.lmr_min_depth and i >= params.lmr_min_move:
+                    reduction = self.lmr_table[min(depth, 63)][min(i, 63)] - (1 if pv_node else 0)
+                    reduction = max(0, min(reduction, new_depth - 1))
+                # PVS: null window first, widen only when the move might actually be better
+                score = -self.negamax(pos, new_depth - reduction, -alpha-1, -alpha, ply+1, start_time)
+                if reduction and score > alpha:
+                    score = -self.negamax(pos, new_depth, -alpha-1, -alpha, ply+1, start_time)
+                if alpha < score < beta:
+                    score = -self.negamax(pos, new_depth, -beta, -alpha, ply+1, start_time)
+            pos.unmake()
 
             if score > best_score:
                 best_score = score
                 best_move = mv
             if score > alpha:
                 alpha = score
-                if not board.is_capture(mv):
-                    self.history_heuristic[(mv.from_square, mv.to_square)] = self.history_heuristic.get((mv.from_square, mv.to_square), 0) + depth*depth
+                if ply < MAX_PLY:
+                    self.pv_table[ply] = [mv] + self.pv_table[ply+1]
+                if not capture:
+                    self.history_heuristic[mv & 0xFFF] = self.history_heuristic.get(mv & 0xFFF, 0) + depth*depth
             if alpha >= beta:
-                if not board.is_capture(mv):
+                if not capture:
                     self.store_killer(ply, mv)
                 break
 
@@ -344,62 +537,167 @@ class ChessAI:
         elif best_score >= beta:
             flag = 1 
         self.tt[key] = TTEntry(depth=depth, score=best_score, flag=flag, move=best_move)
+        if use_cache and not self.time_up(start_time, self.hard_time_limit):
+            self.cache.store_tt(key, depth, best_score, flag, best_move & MOVE_MASK)
 
         return best_score
 
-    def search(self, board: chess.Board, max_depth: int = 6, move_time: float = 2.0) -> chess.Move:
-        self.soft_time_limit = max(0.5, move_time * 0.9)
-        self.hard_time_limit = max(move_time, self.soft_time_limit + 0.2)
+    def search_root(self, pos: Position, root_moves: list[int], stats: dict,
+                    depth: int, alpha: int, beta: int, start: float):
+        """
+        One principal variation search over the root moves. Records each
+        move's score and subtree size in stats for ordering the next
+        iteration. Returns (score, move, pv, complete); when the time or node
+        budget runs out, move is the best among the moves fully searched.
+        """
+        best_score = -INFTY
+        best_move = None
+        best_pv = []
+        for i, mv in enumerate(root_moves):
+            if i > 0 and self.time_up(start, self.soft_time_limit):
+                return best_score, best_move, best_pv, False
+            nodes_before = self.nodes
+            pos.make(mv)
+            if i == 0:
+                score = -self.negamax(pos, depth-1, -beta, -alpha, 1, start)
+            else:
+                score = -self.negamax(pos, depth-1, -alpha-1, -alpha, 1, start)
+                if alpha < score < beta:
+                    score = -self.negamax(pos, depth-1, -beta, -alpha, 1, start)
+            pos.unmake()
+            if self.time_up(start, self.hard_time_limit):
+                return best_score, best_move, best_pv, False
+            stats[mv] = (score, self.nodes - nodes_before)
+
+            if score > best_score:
+                best_score = score
+                best_move = mv
+                best_pv = [mv] + self.pv_table[1]
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score, best_move, best_pv, True
+
+    def extend_pv(self, pos: Position, pv: list[int], length: int) -> list[int]:
+        """Fills out a PV cut short by TT cutoffs by following the stored best moves."""
+        line = []
+        for mv in pv:
+            if mv not in pos.legal_moves():
+                break
+            pos.make(mv)
+            line.append(mv)
+        while len(line) < length:
+            entry = self.tt.get(pos.hash)
+            if entry is None or not entry.move:
+                break
+            legal = {m & MOVE_MASK: m for m in pos.legal_moves()}
+            mv = legal.get(entry.move & MOVE_MASK)
+            if mv is None:
+                break
+            pos.make(mv)
+            line.append(mv)
+        for _ in line:
+            pos.unmake()
+        return line
+
+    def analyse_move(self, board: chess.Board, move: chess.Move, depth: int, alpha: int = -INFTY,
+                     beta: int = INFTY, move_time: float = float("inf")):
+        """
+        Searches a single root move to `depth` inside (alpha, beta), for
+        callers that split the root themselves. Returns (score, pv, complete)
+        with the score from the side to move's point of view.
+        """
+        self.hard_time_limit = move_time
+        self.node_limit = None
+        self.nodes = 0
+        start = time.time()
+        pos = Position.from_board(board)
+        code = move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+        mv = next(m for m in pos.legal_moves() if m & MOVE_MASK == code)
+        pos.make(mv)
+        score = -self.negamax(pos, depth - 1, -beta, -alpha, 1, start)
+        pv = [mv] + self.pv_table[1]
+        pos.unmake()
+        complete = not self.time_up(start, self.hard_time_limit)
+        return score, [move_to_chess(m) for m in pv], complete
+
+    def search(self, board: chess.Board, max_depth: int = 6, move_time: float = 2.0,
+               node_limit: int | None = None, exact_time: bool = False) -> SearchResult:
+        if exact_time:
+            # Test harnesses need the budget they asked for, however short
+            self.soft_time_limit = self.hard_time_limit = move_time
+        else:
+            self.soft_time_limit = max(0.5, move_time * 0.9)
+            self.hard_time_limit = max(move_time, self.soft_time_limit + 0.2)
+        self.node_limit = node_limit
+        self.nodes = 0
 
         if self.book:
             try:
                 entries = list(self.book.find_all(board))
                 if entries:
                     best = max(entries, key=lambda e: e.weight)
-                    return best.move
+                    return SearchResult(move=best.move, score=0, pv=[best.move], depth=0, nodes=0)
             except Exception:
                 pass
 
         start = time.time()
+        pos = Position.from_board(board)
         best_move = None
         best_score = -INFTY
+        best_pv = []
+        completed_depth = 0
+
+        tt_entry = self.tt.get(pos.hash)
+        root_moves = self.order_moves(pos, pos.legal_moves(), tt_entry.move if tt_entry else 0, 0)
+        stats = {mv: (-INFTY, 0) for mv in root_moves}
 
-        alpha, beta = -INFTY, INFTY
         for depth in range(1, max_depth + 1):
-            if time.time() - start > self.soft_time_limit:
+            if self.time_up(start, self.soft_time_limit):
                 break
 
-            score = -INFTY
-            current_best = None
-            moves = self.order_moves(board, list(board.legal_moves), None, 0)
+            # Aspiration window around the last score, widened only on the side that failed
+            delta = ASPIRATION_WINDOW
+            if best_move is not None and not is_mate_score(best_score):
+                alpha, beta = best_score - delta, best_score + delta
+            else:
+                alpha, beta = -INFTY, INFTY
+            while True:
+                score, move, pv, complete = self.search_root(pos, root_moves, stats, depth, alpha, beta, start)
+                if not complete:
+                    break
+                if score <= alpha and alpha > -INFTY:
+                    delta *= 2
+                    alpha = score - delta if delta < 1000 else -INFTY
+                elif score >= beta and beta < INFTY:
+                    delta *= 2
+                    beta = score + delta if delta < 1000 else INFTY
+                else:
+                    break
 
-            a, b = (best_score - 50, best_score + 50) if best_move else (alpha, beta)
+            if complete:
+                best_move, best_score, best_pv = move, score, pv
+                completed_depth = depth
+            elif move is not None and (best_move is None or (alpha < score < beta and move != best_move)):
+                # A partial iteration only counts if a later move beat the previous best inside the window
+                best_move, best_score, best_pv = move, score, pv
 
-            for mv in moves:
-                if time.time() - start > self.soft_time_limit:
-                    break
-                board.push(mv)
-                val = -self.negamax(board, depth-1, -b, -a, 1, start)
-                if val <= a or val >= b:
-                    val = -self.negamax(board, depth-1, -INFTY, INFTY, 1, start)
-                board.pop()
-
-                if val > score:
-                    score = val
-                    current_best = mv
-                if val > a:
-                    a = val
-
-            if current_best is not None:
-                best_move = current_best
-                best_score = score
+            # Previous best first, then by score (bounds for the others) and subtree size
+            root_moves.sort(key=lambda m: (m == best_move, stats[m][0], stats[m][1]), reverse=True)
 
-            if time.time() - start > self.hard_time_limit:
+            if self.time_up(start, self.hard_time_limit):
                 break
 
+        if self.cache is not None:
+            self.cache.maybe_flush()
+
         if best_move is None:
-            best_move = random.choice(list(board.legal_moves))
-        return best_move
+            best_move = random.choice(root_moves)
+            best_pv = [best_move]
+        best_pv = self.extend_pv(pos, best_pv, max(completed_depth, 1))
+        return SearchResult(move=move_to_chess(best_move), score=best_score,
+                            pv=[move_to_chess(mv) for mv in best_pv], depth=completed_depth, nodes=self.nodes)
 
 def get_player_color():
     while True:
@@ -463,7 +761,7 @@ def play_chess(book_path: str | None = None, max_depth: int = 8, move_time: floa
         else:
             print("AI is thinking...")
             start_time = time.time()
-            move = ai.search(board, max_depth=max_depth, move_time=move_time) 
+            move = ai.search(board, max_depth=max_depth, move_time=move_time).move
             board.push(move)
             print(f"AI plays: {move.uci()} (in {time.time()-start_time:.2f}s)")
 
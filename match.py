@@ -0,0 +1,290 @@
+import argparse
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import chess
+import chess.pgn
+import chess.polyglot
+import torch
+
+from main import ChessAI, SearchParams
+from model import DEFAULT_VARIANT
+
+MAX_PLIES = 300
+
+_engines: dict[str, ChessAI] = {}
+
+
+def parse_engine(spec: str) -> dict:
+    """
+    Parses an engine spec such as "name=fast,depth=4,model=small.pth,variant=small-fc,nodes=20000".
+    Unset keys fall back to the global time control; any SearchParams field
+    (e.g. lmr=0,futility_margin=200) is passed through to the search.
+    """
+    config = {"depth": 6, "model": "chess_net.pth", "variant": DEFAULT_VARIANT, "time": None, "nodes": None, "search": {}}
+    for part in spec.split(','):
+        if not part:
+            continue
+        key, _, value = part.partition('=')
+        key = key.strip()
+        if key == "depth":
+            config["depth"] = int(value)
+        elif key == "nodes":
+            config["nodes"] = int(value)
+        elif key == "time":
+            config["time"] = float(value)
+        elif key in ("name", "model", "variant"):
+            config[key] = value.strip()
+        else:
+            config["search"][key] = value
+    SearchParams.from_options(config["search"])
+    config.setdefault("name", f"depth{config['depth']}")
+    return config
+
+
+def book_openings(book_path: str, count: int, plies: int, seed: int) -> list[list[str]]:
+    """Picks `count` distinct opening lines by weighted random walks through a polyglot book."""
+    rng = random.Random(seed)
+    openings = []
+    seen = set()
+    with chess.polyglot.open_reader(book_path) as reader:
+        for _ in range(count * 20):
+            if len(openings) >= count:
+                break
+            board = chess.Board()
+            line = []
+            for _ in range(plies):
+                try:
+                    entry = reader.weighted_choice(board, random=rng)
+                except IndexError:
+                    break
+                line.append(entry.move.uci())
+                board.push(entry.move)
+            key = board.fen()
+            if line and key not in seen:
+                seen.add(key)
+                openings.append(line)
+    return openings
+
+
+def _engine(config: dict) -> ChessAI:
+    ai = _engines.get(config["name"])
+    if ai is None:
+        torch.set_num_threads(1)
+        ai = ChessAI(book_path=None, model_path=config["model"], model_variant=config.get("variant", DEFAULT_VARIANT),
+                     search_params=SearchParams.from_options(config.get("search", {})))
+        _engines[config["name"]] = ai
+    return ai
+
+
+def play_game(game_id: int, opening: list[str], white: dict, black: dict):
+    """
+    Plays one game between two engine configs from the given opening line.
+    Returns (game_id, result, pgn_text, stats) where stats maps engine name to
+    summed nodes, search time, completed depth and number of moves searched.
+    """
+    engines = {chess.WHITE: (white, _engine(white)), chess.BLACK: (black, _engine(black))}
+    for _, ai in engines.values():
+        ai.tt.clear()
+        ai.killer_moves.clear()
+        ai.history_heuristic.clear()
+
+    board = chess.Board()
+    for uci in opening:
+        board.push_uci(uci)
+
+    stats = {cfg["name"]: {"nodes": 0, "time": 0.0, "depth": 0, "moves": 0} for cfg in (white, black)}
+    while not board.is_game_over(claim_draw=True) and board.ply() < MAX_PLIES:
+        config, ai = engines[board.turn]
+        if config["nodes"] is not None:
+            move_time, node_limit = float("inf"), config["nodes"]
+        else:
+            move_time, node_limit = config["time"] or 0.5, None
+        start = time.time()
+        result = ai.search(board, max_depth=config["depth"], move_time=move_time, node_limit=node_limit,
+                           exact_time=True)
+        side = stats[config["name"]]
+        side["time"] += time.time() - start
+        side["nodes"] += result.nodes
+        side["depth"] += result.depth
+        side["moves"] += 1
+        board.push(result.move)
+
+    result = board.result(claim_draw=True)
+    if result == "*":
+        result = "1/2-1/2"
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "Engine match"
+    game.headers["Round"] = str(game_id + 1)
+    game.headers["White"] = white["name"]
+    game.headers["Black"] = black["name"]
+    game.headers["Result"] = result
+    game.headers["Opening"] = ' '.join(opening)
+    return game_id, result, str(game) + "\n\n", stats
+
+
+def elo_from_score(score: float) -> float:
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def elo_estimate(wins: int, draws: int, losses: int) -> tuple[float, float]:
+    """Returns (elo, 95% error margin) for the trinomial score."""
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0, 0.0
+    score = (wins + 0.5 * draws) / n
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    margin = 1.96 * math.sqrt(variance / n)
+    elo = elo_from_score(score)
+    return elo, (elo_from_score(score + margin) - elo_from_score(score - margin)) / 2
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    """Log-likelihood ratio of H1 (elo1) against H0 (elo0) using the normal approximation."""
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0
+    score = (wins + 0.5 * draws) / n
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    if variance <= 0:
+        return 0.0
+    s0 = 1 / (1 + 10 ** (-elo0 / 400))
+    s1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return (s1 - s0) * (2 * score - s0 - s1) * n / (2 * variance)
+
+
+def run_match(engine_a: dict, engine_b: dict, games: int = 100, workers: int | None = None,
+              book_path: str = "Titans.bin", book_plies: int = 8, seed: int = 0,
+              elo0: float = 0.0, elo1: float = 10.0, alpha: float = 0.05, beta: float = 0.05,
+              pgn_path: str | None = "match.pgn"):
+    """
+    Plays engine_a against engine_b with colours reversed on every opening.
+    Elo and the SPRT are reported from engine_a's point of view; the match
+    stops early once the SPRT accepts either hypothesis.
+    """
+    if engine_a["name"] == engine_b["name"]:
+        engine_b = dict(engine_b, name=engine_b["name"] + "-b")
+    openings = book_openings(book_path, (games + 1) // 2, book_plies, seed)
+    schedule = []
+    for i in range(games):
+        opening = openings[(i // 2) % len(openings)]
+        white, black = (engine_a, engine_b) if i % 2 == 0 else (engine_b, engine_a)
+        schedule.append((i, opening, white, black))
+
+    lower = math.log(beta / (1 - alpha))
+    upper = math.log((1 - beta) / alpha)
+    wins = draws = losses = 0
+    totals = {cfg["name"]: {"nodes": 0, "time": 0.0, "depth": 0, "moves": 0} for cfg in (engine_a, engine_b)}
+    verdict = None
+    pgn = open(pgn_path, "w") if pgn_path else None
+    start = time.time()
+
+    workers = workers or os.cpu_count() or 1
+    pending = set()
+    queue = iter(schedule)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for task in queue:
+                pending.add(pool.submit(play_game, *task))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    game_id, result, text, stats = future.result()
+                    a_is_white = game_id % 2 == 0
+                    if result == "1/2-1/2":
+                        draws += 1
+                    elif (result == "1-0") == a_is_white:
+                        wins += 1
+                    else:
+                        losses += 1
+                    for name, side in stats.items():
+                        for key, value in side.items():
+                            totals[name][key] += value
+                    if pgn:
+                        pgn.write(text)
+                        pgn.flush()
+
+                    n = wins + draws + losses
+                    elo, margin = elo_estimate(wins, draws, losses)
+                    llr = sprt_llr(wins, draws, losses, elo0, elo1)
+                    print(f"Game {n}/{games}: +{wins} ={draws} -{losses}  "
+                          f"Elo {elo:+.1f} +/- {margin:.1f}  LLR {llr:.2f} [{lower:.2f}, {upper:.2f}]")
+                    if llr >= upper:
+                        verdict = "H1"
+                    elif llr <= lower:
+                        verdict = "H0"
+
+                if verdict:
+                    for future in pending:
+                        future.cancel()
+                    break
+                for task in queue:
+                    pending.add(pool.submit(play_game, *task))
+                    if len(pending) >= workers * 2:
+                        break
+    finally:
+        if pgn:
+            pgn.close()
+
+    elapsed = time.time() - start
+    elo, margin = elo_estimate(wins, draws, losses)
+    print(f"\n{engine_a['name']} vs {engine_b['name']}: +{wins} ={draws} -{losses} in {elapsed:.1f}s")
+    print(f"Elo: {elo:+.1f} +/- {margin:.1f} (95%)")
+    if verdict == "H1":
+        print(f"SPRT: H1 accepted (elo >= {elo1})")
+    elif verdict == "H0":
+        print(f"SPRT: H0 accepted (elo <= {elo0})")
+    else:
+        print("SPRT: inconclusive")
+    for name, side in totals.items():
+        moves = max(side["moves"], 1)
+        nps = side["nodes"] / side["time"] if side["time"] > 0 else 0.0
+        print(f"  {name}: {nps:.0f} nps, avg depth {side['depth'] / moves:.2f}, "
+              f"{side['time'] / moves:.3f}s/move over {side['moves']} moves")
+
+    return {"wins": wins, "draws": draws, "losses": losses, "elo": elo, "margin": margin,
+            "sprt": verdict, "engines": totals}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play two ChessAI configurations against each other.")
+    parser.add_argument("--engine", action="append", required=True,
+                        help="engine spec, e.g. name=fast,depth=4,model=chess_net.pth (give exactly two)")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--time", type=float, default=0.5, help="fixed time per move in seconds")
+    parser.add_argument("--nodes", type=int, default=None, help="fixed nodes per move (overrides --time)")
+    parser.add_argument("--book", default="Titans.bin")
+    parser.add_argument("--book-plies", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=10.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--pgn", default="match.pgn")
+    args = parser.parse_args()
+
+    if len(args.engine) != 2:
+        parser.error("exactly two --engine specs are required")
+    engines = []
+    for spec in args.engine:
+        config = parse_engine(spec)
+        if config["nodes"] is None and config["time"] is None:
+            config["nodes"] = args.nodes
+            config["time"] = args.time
+        engines.append(config)
+
+    run_match(engines[0], engines[1], games=args.games, workers=args.workers, book_path=args.book,
+              book_plies=args.book_plies, seed=args.seed, elo0=args.elo0, elo1=args.elo1,
+              alpha=args.alpha, beta=args.beta, pgn_path=args.pgn)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,4 +20,76 @@ class ChessNet(nn.Module):
         x = F.relu(self.fc1(x))
         
         x = torch.tanh(self.fc2(x))
-        return x
\ No newline at end of file
+        return x
+
+class SmallFCNet(nn.Module):
+    """ChessNet's convolutions with a 256-unit dense layer instead of 1024."""
+    def __init__(self):
+        super(SmallFCNet, self).__init__()
+        self.conv1 = nn.Conv2d(12, 32, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(32, 64, kernel_size=3, padding=1)
+
+        self.fc1 = nn.Linear(64 * 8 * 8, 256)
+        self.fc2 = nn.Linear(256, 1)
+
+    def forward(self, x):
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = x.view(-1, 64 * 8 * 8)
+        x = F.relu(self.fc1(x))
+        return torch.tanh(self.fc2(x))
+
+class NarrowNet(nn.Module):
+    """Half-width convolutions (16/32 channels) and a 256-unit dense layer."""
+    def __init__(self):
+        super(NarrowNet, self).__init__()
+        self.conv1 = nn.Conv2d(12, 16, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(16, 32, kernel_size=3, padding=1)
+
+        self.fc1 = nn.Linear(32 * 8 * 8, 256)
+        self.fc2 = nn.Linear(256, 1)
+
+    def forward(self, x):
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = x.view(-1, 32 * 8 * 8)
+        x = F.relu(self.fc1(x))
+        return torch.tanh(self.fc2(x))
+
+class PooledNet(nn.Module):
+    """
+    ChessNet's convolutions followed by global average and max pooling, so
+    the head sees 128 features instead of the flattened 4096.
+    """
+    def __init__(self):
+        super(PooledNet, self).__init__()
+        self.conv1 = nn.Conv2d(12, 32, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(32, 64, kernel_size=3, padding=1)
+
+        self.fc1 = nn.Linear(64 * 2, 64)
+        self.fc2 = nn.Linear(64, 1)
+
+    def forward(self, x):
+        x = F.relu(self.conv1(x))
+        x = F.relu(self.conv2(x))
+        x = torch.cat([x.mean(dim=(2, 3)), x.amax(dim=(2, 3))], dim=1)
+        x = F.relu(self.fc1(x))
+        return torch.tanh(self.fc2(x))
+
+# Evaluation network variants selectable by name. All take the (12, 8, 8)
+# board tensor and return a value in [-1, 1], so they share training and search code.
+MODEL_VARIANTS = {
+    "chessnet": ChessNet,
+    "small-fc": SmallFCNet,
+    "narrow": NarrowNet,
+    "pooled": PooledNet,
+}
+DEFAULT_VARIANT = "chessnet"
+
+def build_model(variant: str = DEFAULT_VARIANT) -> nn.Module:
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant: {variant} (choose from {', '.join(MODEL_VARIANTS)})")
+    return MODEL_VARIANTS[variant]()
+
+def parameter_count(model: nn.Module) -> int:
+    return sum(p.numel() for p in model.parameters())
@@ -0,0 +1,76 @@
+import argparse
+import time
+
+import chess
+
+from bitboard import Position, perft
+
+# (name, fen, known node counts for depth 1, 2, 3, ...)
+PERFT_POSITIONS = [
+    ("startpos", chess.STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", [14, 191, 2812, 43238, 674624]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", [44, 1486, 62379, 2103487]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+
+def board_perft(board: chess.Board, depth: int) -> int:
+    """Reference perft on chess.Board with push/pop, as the search used to do it."""
+    if depth == 0:
+        return 1
+    nodes = 0
+    for move in board.legal_moves:
+        board.push(move)
+        nodes += board_perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check bitboard move generation against python-chess and compare speed.")
+    parser.add_argument("--depth", type=int, default=3, help="perft depth (capped at the deepest known count)")
+    parser.add_argument("--skip-reference", action="store_true", help="don't run python-chess perft, only the known counts")
+    args = parser.parse_args()
+
+    failures = 0
+    fast_nodes = fast_time = ref_nodes = ref_time = 0
+    for name, fen, expected in PERFT_POSITIONS:
+        depth = min(args.depth, len(expected))
+        board = chess.Board(fen)
+
+        start = time.perf_counter()
+        nodes = perft(Position.from_board(board), depth)
+        elapsed = time.perf_counter() - start
+        fast_nodes += nodes
+        fast_time += elapsed
+        ok = nodes == expected[depth - 1]
+        line = f"{name:<10} depth {depth}: {nodes:>9} nodes, bitboard {nodes / max(elapsed, 1e-9):>9.0f} nps"
+
+        if not args.skip_reference:
+            start = time.perf_counter()
+            reference = board_perft(board, depth)
+            elapsed = time.perf_counter() - start
+            ref_nodes += reference
+            ref_time += elapsed
+            ok = ok and reference == nodes
+            line += f", python-chess {reference / max(elapsed, 1e-9):>9.0f} nps"
+
+        failures += not ok
+        print(line + ("" if ok else f"  MISMATCH (expected {expected[depth - 1]})"))
+
+    if fast_time:
+        summary = f"Total: bitboard {fast_nodes / fast_time:.0f} nps"
+        if ref_time:
+            summary += f", python-chess {ref_nodes / ref_time:.0f} nps ({ref_time / fast_time:.2f}x)"
+        print(summary)
+    if failures:
+        raise SystemExit(f"{failures} position(s) failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+import hashlib
+import mmap
+import os
+import struct
+import time
+
+MAGIC = b'CBTC'
+VERSION = 1
+HEADER = struct.Struct('<4sI32sQ')
+HEADER_SIZE = 64
+SLOT = struct.Struct('<QQ')
+
+EVAL_VALID = 1 << 32
+
+
+def model_digest(model_path: str | None) -> bytes:
+    """SHA-256 of the model weights, so a cache is never reused with a different network."""
+    digest = hashlib.sha256()
+    if model_path and os.path.exists(model_path):
+        with open(model_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    else:
+        digest.update(b'no-model')
+    return digest.digest()
+
+
+def _signed32(value: int) -> int:
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+class PersistentCache:
+    """
+    Memory-mapped cache of deep transposition table entries and network
+    evaluations that survives restarts.
+
+    The file holds a small header (format version, model hash, table size)
+    followed by two fixed-size tables of 16-byte slots, one for TT entries
+    and one for evaluations, indexed by the polyglot Zobrist hash. Each slot
+    stores `key ^ data` next to `data`, so a torn or colliding slot simply
+    fails verification. That lets several processes map the same file, with
+    read-only processes seeing the writer's entries through the page cache.
+    A stale file is never resized in place: the writer builds a fresh one
+    and renames it over the old path, and every process notices the new
+    file in maybe_flush() and remaps it.
+    """
+
+    def __init__(self, path: str, model_path: str | None = None, max_mb: float = 64,
+                 readonly: bool = False, min_depth: int = 4, flush_interval: float = 30.0):
+        self.path = path
+        self.model_path = model_path
+        self.readonly = readonly
+        self.min_depth = min_depth
+        self.flush_interval = flush_interval
+        self.slots = max(1, int(max_mb * 1024 * 1024) // (2 * SLOT.size))
+
+        self._mm = None
+        self._file = None
+        self._file_id = None
+        self._loaded = False
+        self._dirty = False
+        self._last_flush = time.time()
+        self.hits = 0
+        self.misses = 0
+
+    def _stat_id(self):
+        """(device, inode) of the file currently at self.path, or None if there is none."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def _load(self):
+        """Maps the file on first use; a missing or stale file disables read-only caches."""
+        self._loaded = True
+        digest = model_digest(self.model_path)
+        expected = HEADER.pack(MAGIC, VERSION, digest, self.slots)
+        size = HEADER_SIZE + 2 * self.slots * SLOT.size
+
+        if self.readonly:
+            self._file_id = self._stat_id()
+            try:
+                self._file = open(self.path, 'rb')
+            except FileNotFoundError:
+                print(f"Warning: cache file {self.path} not found, running without it.")
+                return
+            if self._file.read(HEADER.size) != expected:
+                print(f"Warning: cache file {self.path} was built for another model or size, ignoring it.")
+                self._file.close()
+                self._file = None
+                return
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            return
+
+        try:
+            self._file = open(self.path, 'r+b')
+            if self._file.read(HEADER.size) != expected or os.fstat(self._file.fileno()).st_size != size:
+                self._file.close()
+                self._file = None
+        except FileNotFoundError:
+            pass
+        if self._file is None:
+            # Other processes may have the old file mapped, so build the new
+            # one beside it and swap it in rather than truncating under them.
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.truncate(size)
+                f.write(expected)
+            os.replace(tmp, self.path)
+            self._file = open(self.path, 'r+b')
+        st = os.fstat(self._file.fileno())
+        self._file_id = st.st_dev, st.st_ino
+        self._mm = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_WRITE)
+
+    @property
+    def enabled(self) -> bool:
+        if not self._loaded:
+            self._load()
+        return self._mm is not None
+
+    def _read(self, table: int, key: int) -> int | None:
+        offset = HEADER_SIZE + (table * self.slots + key % self.slots) * SLOT.size
+        check, data = SLOT.unpack_from(self._mm, offset)
+        if data and check ^ data == key:
+            self.hits += 1
+            return data
+        self.misses += 1
+        return None
+
+    def _write(self, table: int, key: int, data: int):
+        offset = HEADER_SIZE + (table * self.slots + key % self.slots) * SLOT.size
+        SLOT.pack_into(self._mm, offset, key ^ data, data)
+        self._dirty = True
+
+    def probe_tt(self, key: int):
+        """Returns (depth, score, flag, move) for a stored search result, or None. The move is the low 15 bits of a bitboard move."""
+        if not self.enabled:
+            return None
+        data = self._read(0, key)
+        if data is None:
+            return None
+        return ((data >> 32) & 0xFF, _signed32(data), ((data >> 40) & 0x3) - 1, (data >> 48) & 0x7FFF)
+
+    def store_tt(self, key: int, depth: int, score: int, flag: int, move: int):
+        if depth < self.min_depth or self.readonly or not self.enabled:
+            return
+        offset = HEADER_SIZE + (key % self.slots) * SLOT.size
+        check, old = SLOT.unpack_from(self._mm, offset)
+        if old and check ^ old != key and ((old >> 32) & 0xFF) > depth:
+            return
+        data = (score & 0xFFFFFFFF) | (min(depth, 255) << 32) | ((flag + 1) << 40) | ((move & 0x7FFF) << 48)
+        self._write(0, key, data)
+
+    def probe_eval(self, key: int) -> int | None:
+        if not self.enabled:
+            return None
+        data = self._read(1, key)
+        return None if data is None else _signed32(data)
+
+    def store_eval(self, key: int, score: int):
+        if self.readonly or not self.enabled:
+            return
+        self._write(1, key, (score & 0xFFFFFFFF) | EVAL_VALID)
+
+    def flush(self):
+        if self._mm is not None and self._dirty and not self.readonly:
+            self._mm.flush()
+            self._dirty = False
+        self._last_flush = time.time()
+
+    def maybe_flush(self):
+        """
+        Flushes dirty pages to disk at most once per flush_interval seconds.
+        If another process has replaced the file since it was mapped, the old
+        mapping is dropped and the new file is loaded on next use.
+        """
+        if time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+            if self._loaded and self._stat_id() != self._file_id:
+                self.close()
+                self._loaded = False
+
+    def close(self):
+        self.flush()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,198 @@
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+import chess
+
+# Relative weights of the synthetic mix, roughly what one browser game produces
+DEFAULT_MIX = "legal-moves=6,validate-move=4,board-state=2,position-info=2,evaluate=1,get-move=1,new-game=0.2,health=0.5"
+
+
+def load_log(path: str) -> list[dict]:
+    """Reads a request log written by the server with CHESS_REQUEST_LOG set."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                entries.append({key: entry.get(key) for key in ("method", "path", "query", "body")})
+    return entries
+
+
+def random_positions(count: int, rng: random.Random) -> list[chess.Board]:
+    """Positions from random playouts of varying length, so the mix isn't all openings."""
+    boards = []
+    while len(boards) < count:
+        board = chess.Board()
+        for _ in range(rng.randrange(0, 60)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if not board.is_game_over():
+            boards.append(board)
+    return boards
+
+
+def synthetic_request(endpoint: str, board: chess.Board, rng: random.Random, depth: int, move_time: float) -> dict:
+    fen = board.fen()
+    query = urllib.parse.urlencode({"fen": fen})
+    if endpoint == "legal-moves":
+        return {"method": "GET", "path": "/api/legal-moves", "query": query, "body": None}
+    if endpoint == "position-info":
+        return {"method": "GET", "path": "/api/position-info", "query": query, "body": None}
+    if endpoint == "evaluate":
+        return {"method": "GET", "path": "/api/evaluate", "query": query, "body": None}
+    if endpoint == "health":
+        return {"method": "GET", "path": "/api/health", "query": "", "body": None}
+    if endpoint == "board-state":
+        return {"method": "POST", "path": "/api/board-state", "query": "", "body": {"board": fen}}
+    if endpoint == "validate-move":
+        move = rng.choice(list(board.legal_moves)).uci()
+        return {"method": "POST", "path": "/api/validate-move", "query": "", "body": {"board": fen, "move": move}}
+    if endpoint == "get-move":
+        return {"method": "POST", "path": "/api/get-move", "query": "",
+                "body": {"board": fen, "depth": depth, "moveTime": move_time}}
+    if endpoint == "new-game":
+        return {"method": "POST", "path": "/api/new-game", "query": "",
+                "body": {"player_color": rng.choice(["white", "black"]), "difficulty": "easy"}}
+    raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+
+
+def synthetic_requests(count: int, mix: str, seed: int, depth: int, move_time: float) -> list[dict]:
+    rng = random.Random(seed)
+    weights = {name.strip(): float(weight) for name, weight in (part.split("=", 1) for part in mix.split(",") if part)}
+    endpoints = list(weights)
+    boards = random_positions(min(count, 200), rng)
+    return [synthetic_request(rng.choices(endpoints, weights=[weights[e] for e in endpoints])[0],
+                              rng.choice(boards), rng, depth, move_time)
+            for _ in range(count)]
+
+
+def send(base_url: str, entry: dict, timeout: float) -> tuple[int, float]:
+    """Sends one request and returns (status, seconds); status 0 means no response."""
+    url = base_url + entry["path"] + ("?" + entry["query"] if entry.get("query") else "")
+    data = json.dumps(entry["body"]).encode() if entry.get("body") is not None else None
+    request = urllib.request.Request(url, data=data, method=entry.get("method") or ("POST" if data else "GET"),
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def replay(base_url: str, entries: list[dict], concurrency: int, rate: float, timeout: float):
+    """
+    Sends entries from `concurrency` threads. With rate > 0, request i is
+    scheduled for start + i / rate and its latency is measured from that
+    time, not from when a thread got round to sending it. A server that
+    falls behind the rate is then charged for the queueing delay instead
+    of having those requests quietly sent later (coordinated omission).
+    With rate 0 every thread sends back to back and latency is per request.
+    Returns ([(path, status, seconds)], elapsed).
+    """
+    results = []
+    lock = threading.Lock()
+    next_index = 0
+    start = time.perf_counter()
+
+    def worker():
+        nonlocal next_index
+        while True:
+            with lock:
+                i = next_index
+                next_index += 1
+            if i >= len(entries):
+                return
+            scheduled = None
+            if rate > 0:
+                scheduled = start + i / rate
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            status, seconds = send(base_url, entries[i], timeout)
+            if scheduled is not None:
+                seconds = time.perf_counter() - scheduled
+            with lock:
+                results.append((entries[i]["path"], status, seconds))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - start
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # Nearest-rank percentile
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def report(results: list[tuple[str, int, float]], elapsed: float):
+    by_path = defaultdict(list)
+    for path, status, seconds in results:
+        by_path[path].append((status, seconds))
+
+    print(f"{'endpoint':<22} {'count':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'503':>6}")
+    for path in sorted(by_path, key=lambda p: -len(by_path[p])) + ["total"]:
+        rows = results if path == "total" else [(path, s, t) for s, t in by_path[path]]
+        latencies = sorted(t * 1000 for _, _, t in rows)
+        errors = sum(1 for _, status, _ in rows if status == 0 or (status >= 400 and status != 503))
+        unavailable = sum(1 for _, status, _ in rows if status == 503)
+        print(f"{path:<22} {len(rows):>6} {len(rows) / elapsed:>7.1f} {percentile(latencies, 0.50):>8.1f} "
+              f"{percentile(latencies, 0.95):>8.1f} {percentile(latencies, 0.99):>8.1f} "
+              f"{errors / len(rows):>7.1%} {unavailable / len(rows):>6.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded or synthetic API traffic against a server.")
+    parser.add_argument("log", nargs="?", help="request log recorded with CHESS_REQUEST_LOG (omit for a synthetic mix)")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=8,
+                        help="maximum requests in flight; with --rate, latency includes time spent waiting for a free slot")
+    parser.add_argument("--rate", type=float, default=0.0, help="target requests/s (0 = as fast as possible)")
+    parser.add_argument("--count", type=int, default=None,
+                        help="number of requests (synthetic default 500; a log is cycled or truncated to this)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="synthetic endpoint weights, e.g. legal-moves=5,get-move=1")
+    parser.add_argument("--depth", type=int, default=3, help="depth for synthetic get-move requests")
+    parser.add_argument("--move-time", type=float, default=0.5, help="moveTime for synthetic get-move requests")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.log:
+        entries = load_log(args.log)
+        if not entries:
+            raise SystemExit(f"No requests in {args.log}")
+        if args.count:
+            entries = [entries[i % len(entries)] for i in range(args.count)]
+    else:
+        entries = synthetic_requests(args.count or 500, args.mix, args.seed, args.depth, args.move_time)
+
+    pacing = f"{args.rate:.1f} req/s" if args.rate > 0 else "unthrottled"
+    print(f"Replaying {len(entries)} requests against {args.url} ({args.concurrency} concurrent, {pacing})")
+    results, elapsed = replay(args.url.rstrip("/"), entries, args.concurrency, args.rate, args.timeout)
+    print(f"Completed in {elapsed:.2f}s ({len(results) / elapsed:.1f} req/s)")
+    report(results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 import chess
+import functools
+import hashlib
+import json
 import logging
+import os
+import queue
+import threading
+import time
 from datetime import datetime
 
-from main import ChessAI
-
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -26,7 +32,219 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-chess_ai = ChessAI(book_path="Titans.bin")
+class RequestLogMiddleware:
+    """
+    Appends one JSON line per API request to `path`: timestamp, method,
+    path, query string, JSON body, status and latency in milliseconds.
+    The output can be replayed against a server with replay.py. Lines are
+    written by a background thread so the event loop never waits on disk,
+    and the file is closed when the app shuts down.
+    """
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self._queue = queue.Queue()
+        self._file = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._writer, name="request-log", daemon=True)
+        self._thread.start()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            async def lifespan_send(message):
+                if message["type"] == "lifespan.shutdown.complete":
+                    self.close()
+                await send(message)
+
+            await self.app(scope, receive, lifespan_send)
+            return
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        chunks = []
+        status = 500
+
+        async def logged_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                chunks.append(message.get("body", b""))
+            return message
+
+        async def logged_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, logged_receive, logged_send)
+        finally:
+            self.write(scope, b"".join(chunks), status, time.perf_counter() - start)
+
+    def write(self, scope, raw_body: bytes, status: int, elapsed: float):
+        try:
+            body = json.loads(raw_body) if raw_body else None
+        except ValueError:
+            body = raw_body.decode("utf-8", "replace")
+        entry = {
+            "ts": round(time.time(), 3),
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "body": body,
+            "status": status,
+            "latency_ms": round(elapsed * 1000, 2),
+        }
+        self._queue.put(json.dumps(entry) + "\n")
+
+    def _writer(self):
+        while True:
+            line = self._queue.get()
+            if line is None:
+                break
+            self._file.write(line)
+            if self._queue.empty():
+                self._file.flush()
+        self._file.close()
+
+    def close(self):
+        """Writes out everything queued so far and closes the log file."""
+        self._queue.put(None)
+        self._thread.join()
+
+# Opt-in request capture for load testing, e.g. CHESS_REQUEST_LOG=request_log.jsonl
+if os.environ.get("CHESS_REQUEST_LOG"):
+    app.add_middleware(RequestLogMiddleware, path=os.environ["CHESS_REQUEST_LOG"])
+
+# The engine (and with it torch) is only imported once an AI endpoint needs it
+# or the warm-up runs, so the rules endpoints start instantly without torch.
+chess_ai = None
+ai_load_error = None
+_ai_lock = threading.Lock()
+
+def get_chess_ai():
+    global chess_ai, ai_load_error
+    if chess_ai is None:
+        with _ai_lock:
+            if chess_ai is None:
+                start = time.time()
+                try:
+                    from main import ChessAI
+                    ai = ChessAI(
+                        book_path="Titans.bin",
+                        model_path=os.environ.get("CHESS_MODEL_PATH", "chess_net.pth"),
+                        model_variant=os.environ.get("CHESS_MODEL_VARIANT", "chessnet"),
+                        cache_path=os.environ.get("CHESS_CACHE_PATH"),
+                        cache_readonly=os.environ.get("CHESS_CACHE_READONLY", "0") == "1",
+                        cache_mb=float(os.environ.get("CHESS_CACHE_MB", "64")),
+                    )
+                    ai.warm_up()
+                except Exception as e:
+                    # Kept for /api/ready, e.g. corrupt weights or a variant that doesn't match them
+                    ai_load_error = f"{type(e).__name__}: {e}"
+                    logger.error(f"Engine failed to load: {ai_load_error}")
+                    raise
+                chess_ai = ai
+                ai_load_error = None
+                logger.info(f"Engine loaded and warmed up in {time.time() - start:.2f}s")
+    return chess_ai
+
+def warm_up_engine():
+    try:
+        get_chess_ai()
+    except Exception:
+        pass  # already logged and reported by /api/ready
+
+async def load_chess_ai():
+    """
+    get_chess_ai() for async endpoints: while the engine is still loading it
+    waits in a worker thread, so one request never blocks the event loop on
+    _ai_lock and the rest of the API keeps answering.
+    """
+    if chess_ai is not None:
+        return chess_ai
+    return await run_in_threadpool(get_chess_ai)
+
+@app.on_event("startup")
+async def start_warm_up():
+    if os.environ.get("CHESS_WARMUP", "1") == "1":
+        threading.Thread(target=warm_up_engine, name="engine-warm-up", daemon=True).start()
+
+POSITION_CACHE_SIZE = int(os.environ.get("CHESS_POSITION_CACHE_SIZE", "4096"))
+
+def normalize_fen(fen: str) -> str:
+    """Collapses whitespace and drops the fullmove number, which never affects the result."""
+    return " ".join(fen.split()[:5])
+
+def describe_board(board: chess.Board) -> dict:
+    return {
+        "is_check": board.is_check(),
+        "is_checkmate": board.is_checkmate(),
+        "is_stalemate": board.is_stalemate(),
+        "is_insufficient_material": board.is_insufficient_material(),
+        "is_game_over": board.is_game_over(),
+        "legal_moves": [move.uci() for move in board.legal_moves],
+        "turn": 'white' if board.turn == chess.WHITE else 'black'
+    }
+
+def describe_legal_moves(board: chess.Board) -> list[dict]:
+    moves = []
+    for move in board.legal_moves:
+        # SAN already carries the check suffix, so gives_check() is not needed
+        san = board.san(move)
+        moves.append({
+            "uci": move.uci(),
+            "san": san,
+            "from_square": chess.square_name(move.from_square),
+            "to_square": chess.square_name(move.to_square),
+            "is_capture": board.is_capture(move),
+            "is_check": san.endswith(('+', '#'))
+        })
+    return moves
+
+def white_eval(board: chess.Board) -> int:
+    """Engine evaluation in centipawns from White's point of view."""
+    score = get_chess_ai().evaluate(board)
+    return score if board.turn == chess.WHITE else -score
+
+def describe_evaluation(eval_score: int) -> dict:
+    # Convert to pawns (centipawns / 100)
+    eval_pawns = eval_score / 100
+    
+    # Determine advantage
+    if abs(eval_pawns) < 0.2:
+        advantage = "equal"
+    elif eval_pawns > 0:
+        advantage = "white"
+    else:
+        advantage = "black"
+    
+    return {
+        "evaluation": round(eval_pawns, 2),
+        "centipawns": eval_score,
+        "advantage": advantage,
+        "is_mate_score": abs(eval_score) >= 10000000 - 1000
+    }
+
+@functools.lru_cache(maxsize=POSITION_CACHE_SIZE)
+def position_bundle(fen: str, include_eval: bool) -> tuple[dict, str]:
+    """
+    Builds the combined state/moves/eval payload for a normalized FEN along
+    with its ETag. Invalid FENs raise ValueError and are not cached.
+    """
+    board = chess.Board(fen)
+    legal_moves = describe_legal_moves(board)
+    payload = {
+        "normalized_fen": fen,
+        "state": describe_board(board),
+        "legal_moves": legal_moves,
+        "count": len(legal_moves),
+        "evaluation": describe_evaluation(white_eval(board)) if include_eval else None
+    }
+    etag = '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest() + '"'
+    return payload, etag
 
 class MoveRequest(BaseModel):
     board: str 
@@ -37,6 +255,8 @@ class MoveResponse(BaseModel):
     move: str 
     evaluation: Optional[float] = None
     thinking_time: float
+    pv: list[str] = []
+    depth: Optional[int] = None
 
 class BoardStateRequest(BaseModel):
     board: str
@@ -79,6 +299,8 @@ async def root():
             "/api/validate-move": "Validate a move and get resulting position",
             "/api/new-game": "Start a new game",
             "/api/legal-moves": "Get all legal moves for a position",
+            "/api/position-info": "Get board state, legal moves and evaluation in one call",
+            "/api/ready": "Readiness check (engine loaded and warmed up)",
             "/docs": "API documentation"
         }
     }
@@ -94,23 +316,26 @@ async def get_ai_move(request: MoveRequest):
     """
     try:
         board = chess.Board(request.board)
+        if not board.is_valid():
+            raise ValueError(f"Illegal position ({board.status()!r})")
         
         if board.is_game_over():
             raise HTTPException(status_code=400, detail="Game is already over")
         
         depth = request.depth
         move_time = request.moveTime
+        ai = await load_chess_ai()
         
-        import time
         start_time = time.time()
         
         logger.info(f"AI thinking: depth={depth}, time_limit={move_time}s")
-        move = chess_ai.search(board, max_depth=depth, move_time=move_time)
+        result = ai.search(board, max_depth=depth, move_time=move_time)
+        move = result.move
         
         thinking_time = time.time() - start_time
         
         board.push(move)
-        evaluation = chess_ai.evaluate(board) / 100
+        evaluation = white_eval(board) / 100
         board.pop()
         
         logger.info(f"AI move: {move.uci()} (eval: {evaluation:.2f}, time: {thinking_time:.2f}s)")
@@ -118,11 +343,15 @@ async def get_ai_move(request: MoveRequest):
         return MoveResponse(
             move=move.uci(),
             evaluation=evaluation,
-            thinking_time=round(thinking_time, 2)
+            thinking_time=round(thinking_time, 2),
+            pv=[mv.uci() for mv in result.pv],
+            depth=result.depth
         )
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid FEN string: {str(e)}")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting AI move: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -137,15 +366,7 @@ async def get_board_state(request: BoardStateRequest):
     try:
         board = chess.Board(request.board)
         
-        return BoardStateResponse(
-            is_check=board.is_check(),
-            is_checkmate=board.is_checkmate(),
-            is_stalemate=board.is_stalemate(),
-            is_insufficient_material=board.is_insufficient_material(),
-            is_game_over=board.is_game_over(),
-            legal_moves=[move.uci() for move in board.legal_moves],
-            turn='white' if board.turn == chess.WHITE else 'black'
-        )
+        return BoardStateResponse(**describe_board(board))
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid FEN string: {str(e)}")
@@ -194,23 +415,11 @@ async def get_legal_moves(fen: str):
     - **fen**: FEN string representing the board position
     """
     try:
-        board = chess.Board(fen)
-        
-        moves = []
-        for move in board.legal_moves:
-            move_info = {
-                "uci": move.uci(),
-                "san": board.san(move),
-                "from_square": chess.square_name(move.from_square),
-                "to_square": chess.square_name(move.to_square),
-                "is_capture": board.is_capture(move),
-                "is_check": board.gives_check(move)
-            }
-            moves.append(move_info)
+        payload, _ = position_bundle(normalize_fen(fen), False)
         
         return {
-            "legal_moves": moves,
-            "count": len(moves)
+            "legal_moves": payload["legal_moves"],
+            "count": payload["count"]
         }
         
     except ValueError as e:
@@ -248,7 +457,8 @@ async def new_game(request: NewGameRequest):
     }
     
     if request.player_color == 'black':
-        move = chess_ai.search(board, max_depth=settings['depth'], move_time=settings['time'])
+        ai = await load_chess_ai()
+        move = ai.search(board, max_depth=settings['depth'], move_time=settings['time']).move
         board.push(move)
         response["ai_first_move"] = move.uci()
         response["fen"] = board.fen()
@@ -264,31 +474,59 @@ async def evaluate_position(fen: str):
     """
     try:
         board = chess.Board(fen)
+        await load_chess_ai()
         
         # Get raw evaluation
-        eval_score = chess_ai.evaluate(board)
-        
-        # Convert to pawns (centipawns / 100)
-        eval_pawns = eval_score / 100
+        eval_score = white_eval(board)
         
-        # Determine advantage
-        if abs(eval_pawns) < 0.2:
-            advantage = "equal"
-        elif eval_pawns > 0:
-            advantage = "white"
-        else:
-            advantage = "black"
-        
-        return {
-            "evaluation": round(eval_pawns, 2),
-            "centipawns": eval_score,
-            "advantage": advantage,
-            "is_mate_score": abs(eval_score) >= 10000000 - 1000
-        }
+        return describe_evaluation(eval_score)
         
     except ValueError as e:
         raise HTTPException(status_code=400, detail=f"Invalid FEN string: {str(e)}")
 
+@app.get("/api/position-info")
+async def get_position_info(response: Response, fen: str, eval: bool = True,
+                            if_none_match: Optional[str] = Header(None)):
+    """
+    Get board state, legal moves (with SAN) and evaluation in a single call.
+    Results are cached by normalized FEN and carry an ETag; send it back in
+    If-None-Match to get a 304 when nothing changed.
+    
+    - **fen**: FEN string representing the board position
+    - **eval**: Include the engine evaluation (loads the engine if needed)
+    """
+    if eval:
+        await load_chess_ai()
+    try:
+        payload, etag = position_bundle(normalize_fen(fen), eval)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid FEN string: {str(e)}")
+    
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return payload
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    """Hit/miss statistics for the position cache and the persistent engine cache"""
+    info = position_bundle.cache_info()
+    stats = {
+        "position_cache": {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hit_rate": round(info.hits / (info.hits + info.misses), 4) if info.hits + info.misses else 0.0
+        }
+    }
+    if chess_ai is not None and chess_ai.cache is not None:
+        stats["persistent_cache"] = {
+            "hits": chess_ai.cache.hits,
+            "misses": chess_ai.cache.misses
+        }
+    return stats
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
@@ -297,6 +535,24 @@ async def health_check():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/ready")
+async def readiness_check(response: Response):
+    """Readiness endpoint: 503 until the engine is loaded and warmed up, or if loading failed"""
+    if chess_ai is None:
+        response.status_code = 503
+        if ai_load_error is not None:
+            return {"status": "failed", "error": ai_load_error}
+        return {"status": "loading"}
+    return {
+        "status": "ready",
+        "model_loaded": chess_ai.model is not None
+    }
+
+@app.on_event("shutdown")
+async def flush_cache():
+    if chess_ai is not None and chess_ai.cache is not None:
+        chess_ai.cache.close()
+
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 if __name__ == "__main__":
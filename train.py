@@ -1,7 +1,15 @@
+import argparse
+import contextlib
+import os
+import time
 import torch
 import torch.optim as optim
 import torch.nn as nn
-from model import ChessNet
+import torch.distributed as dist
+import torch.multiprocessing as mp
+from torch.distributed.algorithms.join import Join
+from torch.nn.parallel import DistributedDataParallel
+from model import build_model, parameter_count, MODEL_VARIANTS, DEFAULT_VARIANT
 from data_processor import parse_database
 
 # --- Hyperparameters ---
@@ -11,53 +19,210 @@ EPOCHS = 10
 DATABASE_PATH = "database.pgn.zst"
 MAX_GAMES_TO_PROCESS = 50000
 MODEL_SAVE_PATH = "chess_net.pth"
+CHECKPOINT_PATH = "checkpoint.pth"
+CHECKPOINT_EVERY = 500  # batches
+MASTER_PORT = 29517
 
-def train():
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    print(f"Using device: {device}")
+def save_checkpoint(path, model, optimizer, epoch, batch):
+    """
+    Saves everything needed to resume: weights, optimizer state and the
+    position in the run (epoch and batches already trained in that epoch).
+    """
+    tmp = path + ".tmp"
+    torch.save({
+        "model": model.state_dict(),
+        "optimizer": optimizer.state_dict(),
+        "epoch": epoch,
+        "batch": batch,
+    }, tmp)
+    os.replace(tmp, path)
 
-    model = ChessNet().to(device)
-    optimizer = optim.Adam(model.parameters(), lr=LEARNING_RATE)
+def train_worker(rank, world_size, config, results=None):
+    """
+    Trains on every world_size-th game of the database. With world_size > 1
+    the processes form a gloo process group and DistributedDataParallel
+    averages gradients each step; ranks that run out of data early are
+    handled by Join, as the shards are not exactly the same size.
+    """
+    distributed = world_size > 1
+    if distributed:
+        os.environ.setdefault("MASTER_ADDR", "127.0.0.1")
+        os.environ.setdefault("MASTER_PORT", str(config["port"]))
+        dist.init_process_group("gloo", rank=rank, world_size=world_size)
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // world_size))
+    is_main = rank == 0
+
+    device = torch.device("cuda" if torch.cuda.is_available() and not distributed else "cpu")
+    if is_main:
+        print(f"Using device: {device}, {world_size} process(es)")
+
+    model = build_model(config["variant"]).to(device)
+    if is_main:
+        print(f"Model variant: {config['variant']} ({parameter_count(model):,} parameters)")
+    optimizer = optim.Adam(model.parameters(), lr=config["lr"])
     criterion = nn.MSELoss()
+    batch_size = config["batch_size"]
+
+    start_epoch, skip_batches = 0, 0
+    if config["resume"] and os.path.exists(config["checkpoint"]):
+        checkpoint = torch.load(config["checkpoint"], map_location=device)
+        model.load_state_dict(checkpoint["model"])
+        optimizer.load_state_dict(checkpoint["optimizer"])
+        start_epoch, skip_batches = checkpoint["epoch"], checkpoint["batch"]
+        if is_main:
+            print(f"Resuming from epoch {start_epoch+1}, batch {skip_batches}")
 
-    print("Starting training...")
-    for epoch in range(EPOCHS):
+    net = DistributedDataParallel(model) if distributed else model
+
+    if is_main:
+        print("Starting training...")
+    for epoch in range(start_epoch, config["epochs"]):
         running_loss = 0.0
         position_count = 0
-        
-        data_generator = parse_database(DATABASE_PATH, max_games=MAX_GAMES_TO_PROCESS)
-        
+        batch_count = 0
+        epoch_start = time.time()
+
+        data_generator = parse_database(config["database"], max_games=config["max_games"],
+                                        shard=rank, num_shards=world_size)
+
         batch_tensors = []
         batch_labels = []
 
-        for tensor, label in data_generator:
-            batch_tensors.append(tensor)
-            batch_labels.append(label)
-            
-            if len(batch_tensors) >= BATCH_SIZE:
-                tensors = torch.stack(batch_tensors).to(device)
-                labels = torch.tensor(batch_labels, dtype=torch.float32).unsqueeze(1).to(device)
-                
-                optimizer.zero_grad()
-                
-                outputs = model(tensors)
-                loss = criterion(outputs, labels)
-                
-                loss.backward()
-                optimizer.step()
-                
-                running_loss += loss.item()
-                position_count += BATCH_SIZE
-
-                batch_tensors, batch_labels = [], []
-
-                if position_count % (100 * BATCH_SIZE) == 0:
-                    print(f"Epoch {epoch+1}, Positions {position_count}: Loss = {running_loss / (position_count / BATCH_SIZE):.6f}")
-
-        print(f"Epoch {epoch+1} finished. Average Loss: {running_loss / (position_count / BATCH_SIZE):.6f}")
-
-        torch.save(model.state_dict(), MODEL_SAVE_PATH)
-        print(f"Model saved to {MODEL_SAVE_PATH}")
+        with Join([net]) if distributed else contextlib.nullcontext():
+            for tensor, label in data_generator:
+                batch_tensors.append(tensor)
+                batch_labels.append(label)
+
+                if len(batch_tensors) >= batch_size:
+                    batch_count += 1
+                    if batch_count <= skip_batches:
+                        batch_tensors, batch_labels = [], []
+                        continue
+
+                    tensors = torch.stack(batch_tensors).to(device)
+                    labels = torch.tensor(batch_labels, dtype=torch.float32).unsqueeze(1).to(device)
+
+                    optimizer.zero_grad()
+
+                    outputs = net(tensors)
+                    loss = criterion(outputs, labels)
+
+                    loss.backward()
+                    optimizer.step()
+
+                    running_loss += loss.item()
+                    position_count += batch_size
+
+                    batch_tensors, batch_labels = [], []
+
+                    if is_main and position_count % (100 * batch_size) == 0:
+                        rate = position_count * world_size / (time.time() - epoch_start)
+                        print(f"Epoch {epoch+1}, Positions {position_count}: Loss = {running_loss / (position_count / batch_size):.6f} "
+                              f"(~{rate:.0f} positions/s)")
+
+                    if is_main and config["checkpoint_every"] and batch_count % config["checkpoint_every"] == 0:
+                        save_checkpoint(config["checkpoint"], model, optimizer, epoch, batch_count)
+        skip_batches = 0
+
+        elapsed = time.time() - epoch_start
+        totals = torch.tensor([position_count, running_loss], dtype=torch.float64)
+        if distributed:
+            dist.all_reduce(totals)
+        total_positions, total_loss = totals.tolist()
+        throughput = total_positions / elapsed if elapsed > 0 else 0.0
+
+        if is_main:
+            batches = max(total_positions / batch_size, 1)
+            print(f"Epoch {epoch+1} finished. Average Loss: {total_loss / batches:.6f}, "
+                  f"{int(total_positions)} positions in {elapsed:.1f}s ({throughput:.0f} positions/s)")
+            if config["save"]:
+                torch.save(model.state_dict(), config["model_path"])
+                save_checkpoint(config["checkpoint"], model, optimizer, epoch + 1, 0)
+                print(f"Model saved to {config['model_path']}")
+            if results is not None:
+                results.put(throughput)
+
+    if distributed:
+        dist.destroy_process_group()
+
+def default_model_path(variant):
+    """chess_net.pth for the default network, <variant>.pth for the others, so variants never overwrite each other."""
+    return MODEL_SAVE_PATH if variant == "chessnet" else f"{variant}.pth"
+
+def make_config(**overrides):
+    config = {
+        "variant": DEFAULT_VARIANT,
+        "lr": LEARNING_RATE,
+        "batch_size": BATCH_SIZE,
+        "epochs": EPOCHS,
+        "database": DATABASE_PATH,
+        "max_games": MAX_GAMES_TO_PROCESS,
+        "model_path": None,
+        "checkpoint": CHECKPOINT_PATH,
+        "checkpoint_every": CHECKPOINT_EVERY,
+        "resume": False,
+        "save": True,
+        "port": MASTER_PORT,
+    }
+    config.update(overrides)
+    if config["model_path"] is None:
+        config["model_path"] = default_model_path(config["variant"])
+    return config
+
+def train(world_size=1, **overrides):
+    config = make_config(**overrides)
+    if world_size == 1:
+        train_worker(0, 1, config)
+    else:
+        mp.spawn(train_worker, args=(world_size, config), nprocs=world_size, join=True)
+
+def benchmark_scaling(rank_counts=(1, 2, 4, 8), **overrides):
+    """
+    Trains one epoch for each process count and reports throughput and
+    scaling efficiency relative to a single process.
+    """
+    ctx = mp.get_context("spawn")
+    baseline = None
+    for i, world_size in enumerate(rank_counts):
+        results = ctx.SimpleQueue()
+        config = make_config(**dict(overrides, epochs=1, resume=False, save=False, checkpoint_every=0,
+                                    port=MASTER_PORT + 1 + i))
+        if world_size == 1:
+            proc = ctx.Process(target=train_worker, args=(0, 1, config, results))
+            proc.start()
+            proc.join()
+        else:
+            mp.start_processes(train_worker, args=(world_size, config, results), nprocs=world_size,
+                               join=True, start_method="spawn")
+        throughput = results.get()
+        baseline = baseline or throughput
+        efficiency = throughput / (baseline * world_size)
+        print(f"Scaling: {world_size} rank(s): {throughput:.0f} positions/s, "
+              f"speedup {throughput / baseline:.2f}x, efficiency {efficiency:.0%}")
 
 if __name__ == "__main__":
-    train()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train an evaluation network on a PGN database.")
+    parser.add_argument("--variant", default=DEFAULT_VARIANT, choices=list(MODEL_VARIANTS),
+                        help="evaluation network architecture")
+    parser.add_argument("--world-size", type=int, default=1, help="number of local data-parallel processes")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="batch size per process")
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--lr", type=float, default=LEARNING_RATE)
+    parser.add_argument("--database", default=DATABASE_PATH)
+    parser.add_argument("--max-games", type=int, default=MAX_GAMES_TO_PROCESS)
+    parser.add_argument("--model-path", default=None,
+                        help=f"where to save the weights (default: {MODEL_SAVE_PATH} for chessnet, <variant>.pth otherwise)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY, help="batches between checkpoints")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--scaling", default=None,
+                        help="comma-separated process counts to benchmark, e.g. 1,2,4,8")
+    args = parser.parse_args()
+
+    options = dict(variant=args.variant, lr=args.lr, batch_size=args.batch_size, epochs=args.epochs, database=args.database,
+                   max_games=args.max_games, model_path=args.model_path, checkpoint=args.checkpoint,
+                   checkpoint_every=args.checkpoint_every, resume=args.resume)
+    if args.scaling:
+        benchmark_scaling([int(n) for n in args.scaling.split(',')], **options)
+    else:
+        train(args.world_size, **options)